@@ -1,5 +1,11 @@
+import sys
 import numpy as np
+import statistics
 import timeit
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from dataclasses import dataclass
 import matplotlib.pyplot as plt
 
 Blue = '\033[94m'
@@ -8,85 +14,168 @@ Yellow = '\033[93m'
 END = '\033[0m'
 
 
-# decorator exec_time which calculates and outputs the execution time
-# of a decorated function.
-# The execution time is calculated in microseconds
-# and the results can also be stored
-# in the running_time dictionary for later use (e.g. for graphing).
-# The decorated function is passed as an argument to exec_time,
-# and the returned value from exec_time (which is a nested function real_decorator)
-# is used to further decorate the function.
+# Timing harness
+# measure() first does a few warm-up calls, then calibrates how many calls
+# make up one sample: the count doubles until a sample lasts at least
+# SAMPLE_MIN_TIME seconds, so sub-microsecond functions are not lost in the
+# timer resolution. After that it takes `repeat` samples and stores the time
+# per call for each one.
+# The timed region is only the call loop. Nothing is printed or allocated inside it,
+# and the samples list is allocated before timing starts.
+SAMPLE_MIN_TIME = 0.001
+WARMUP_CALLS = 3
+REPEAT = 7
 
 
-def exec_time(name):
-    def real_decorator(func):
-        result = None
+@dataclass
+class Timing:
+    name: str
+    n: int
+    loops: int
+    samples: list  # seconds per call, one value per sample
 
-        def wrapper(n):
-            t_start = timeit.default_timer()
-            result = func(n)
-            t_end = timeit.default_timer()
+    @property
+    def min(self) -> float:
+        return min(self.samples)
 
-            # * 10 ** 6 scales the elapsed time to microseconds,
-            # #as 10 ** 6 is equivalent to 10 raised to the power of 6,
-            # which equals 1 million.
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
 
-            elapsed_time = round((t_end - t_start) * 10 ** 6, 4)
-            print(
-                f'Result for the input  {Red}{result}{END}: '
-                f'{Red}{elapsed_time}{END} microseconds.')
+    @property
+    def iqr(self) -> float:
+        if len(self.samples) < 2:
+            return 0.0
+        q1, _, q3 = statistics.quantiles(self.samples, n=4)
+        return q3 - q1
 
-            # saving the  results for graphs
-            if name in running_time.keys():
-                running_time[name].append(elapsed_time)
-            else:
-                running_time[name] = list()
-                running_time[name].append(elapsed_time)
 
-            return result
+# all timings of a run, grouped by method name in insertion order
+class BenchmarkResults:
+    def __init__(self):
+        self.timings = dict()
 
-        return wrapper
+    def add(self, timing: Timing):
+        self.timings.setdefault(timing.name, []).append(timing)
 
-    return real_decorator
+    def remove(self, name: str):
+        del self.timings[name]
+
+    def names(self) -> list:
+        return list(self.timings.keys())
+
+    # median time per call in microseconds, one value per measured n
+    def medians_us(self, name: str) -> list:
+        return [timing.median * 10 ** 6 for timing in self.timings[name]]
+
+
+def measure(func, n, name=None, repeat=REPEAT, warmup=WARMUP_CALLS, min_time=SAMPLE_MIN_TIME) -> Timing:
+    timer = timeit.default_timer
+
+    for _ in range(warmup):
+        func(n)
+
+    # calibrate the number of calls per sample
+    loops = 1
+    while True:
+        t_start = timer()
+        for _ in range(loops):
+            func(n)
+        elapsed = timer() - t_start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+
+    samples = [0.0] * repeat
+    calls = range(loops)
+    for r in range(repeat):
+        t_start = timer()
+        for _ in calls:
+            func(n)
+        t_end = timer()
+        samples[r] = (t_end - t_start) / loops
+
+    return Timing(name or func.__name__, n, loops, samples)
 
 
-running_time = dict()
 values = [1, 10, 20, 30, 40, 50, 60, 70, 80]
 # values = [180,190,200]
 
 
-def exec_time_recursive(func, name, *args):
-    t_start = timeit.default_timer()
-    t_end = timeit.default_timer()
-    func(args[0])
+# Shared Fibonacci cache for all exact methods.
+# Every entry maps k -> (F(k), F(k + 1)), so a method can extend the sequence
+# from the highest cached index below n instead of starting at zero.
+# Big integer terms get large, so the cache is bounded both by number of
+# entries and by bytes; the least recently used entries are evicted first.
+# Set fib_cache_enabled to False to time the algorithms without the cache.
+# Stats: 'hits' found n itself, 'extends' started from a cached k < n (and
+# 'steps_saved' adds up those k), 'misses' found nothing to start from.
+FIB_CACHE_MAX_ENTRIES = 1024
+FIB_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+fib_cache_enabled = True
+fib_cache = OrderedDict()
+fib_cache_keys = []  # cached indices, kept sorted for bisect
+fib_cache_stats = {'hits': 0, 'extends': 0, 'steps_saved': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+
+# returns (k, F(k), F(k + 1)) for the highest cached k <= n, or (0, 0, 1)
+def fib_cache_lookup(n):
+    if not fib_cache_enabled:
+        return 0, 0, 1
+
+    pos = bisect_right(fib_cache_keys, n)
+    if pos == 0:
+        fib_cache_stats['misses'] += 1
+        return 0, 0, 1
+
+    k = fib_cache_keys[pos - 1]
+    fib_cache.move_to_end(k)
+    if k == n:
+        fib_cache_stats['hits'] += 1
+    else:
+        fib_cache_stats['extends'] += 1
+        fib_cache_stats['steps_saved'] += k
+    a, b = fib_cache[k]
 
-    elapsed_time = round((t_end - t_start) * 10 ** 6, 4)
-    print(f'Result for the  input {args[0]}{END}: {Red}{elapsed_time}{END} microseconds.')
+    return k, a, b
 
-    # save results for graphing
-    if name in running_time.keys():
-        running_time[name].append(elapsed_time)
-    else:
-        running_time[name] = list()
-        running_time[name].append(elapsed_time)
+
+def fib_cache_store(k, a, b):
+    if not fib_cache_enabled:
+        return
+    if k in fib_cache:
+        fib_cache.move_to_end(k)
+        return
+
+    fib_cache[k] = (a, b)
+    insort(fib_cache_keys, k)
+    fib_cache_stats['bytes'] += sys.getsizeof(a) + sys.getsizeof(b)
+
+    # evict least recently used entries until we are back within budget
+    while len(fib_cache) > FIB_CACHE_MAX_ENTRIES or fib_cache_stats['bytes'] > FIB_CACHE_MAX_BYTES:
+        old_k, (old_a, old_b) = fib_cache.popitem(last=False)
+        del fib_cache_keys[bisect_left(fib_cache_keys, old_k)]
+        fib_cache_stats['bytes'] -= sys.getsizeof(old_a) + sys.getsizeof(old_b)
+        fib_cache_stats['evictions'] += 1
 
 
-def plot_result():
-    names = np.array(list(running_time.keys()))
-    times = np.array(list(running_time.values()))
-    algorithm_num = 0
+def fib_cache_clear():
+    fib_cache.clear()
+    fib_cache_keys.clear()
+    fib_cache_stats.update(hits=0, extends=0, steps_saved=0, misses=0, evictions=0, bytes=0)
 
+
+def plot_result(results: BenchmarkResults):
     plt.title('RUNNING TIME ', fontsize=15, color='blue', fontweight='bold')
     plt.xlabel('Values', fontsize=15, color='blue')
-    plt.ylabel("Time (microseconds)", fontsize=13, color='blue')
-
-    for history in times:
-        x_axis = np.array(values)
-        y_axis = times[algorithm_num]
+    plt.ylabel("Median time (microseconds)", fontsize=13, color='blue')
 
-        plt.plot(x_axis, y_axis, label=names[algorithm_num])
+    x_axis = np.array(values)
+    for name in results.names():
+        y_axis = np.array(results.medians_us(name))
 
-        algorithm_num += 1
+        plt.plot(x_axis, y_axis, label=name)
 
     plt.legend()
     plt.grid()
@@ -94,39 +183,44 @@ def plot_result():
 
 
 # First Method = Iterative Method
-@exec_time('ITERATIVE_METHOD')
 def iterative_fib(n: int) -> int:
-    i, j = 0, 0
+    # start from the highest cached term: i = F(k), j = F(k + 1)
+    k, i, j = fib_cache_lookup(n)
 
-    for k in range(n):
+    for _ in range(n - k):
         j = i + j
         i = j - i
 
-    return j
+    fib_cache_store(n, i, j)
+
+    return i
 
 
 # Second Method = Iterative Memoization
-@exec_time('ITERATIVE MEMOIZATION')
 def iterative_fib_with_memoization(n: int) -> int:
-    fib = [0, 1]
+    # fib[i] holds F(k + i), seeded from the shared cache
+    k, a, b = fib_cache_lookup(n)
+    fib = [a, b]
 
-    for i in range(2, n + 1):
+    for i in range(2, n - k + 2):
         fib.append(fib[i - 1] + fib[i - 2])
 
-    return fib[n]
+    fib_cache_store(n, fib[n - k], fib[n - k + 1])
+
+    return fib[n - k]
 
 
 # Third Method = Dynamic
-@exec_time('DYNAMIC_METHOD')
 def fibonacci_dynamic(num):
-    fibonacci = [0, 1]
-    for i in range(2, num + 1):
+    k, a, b = fib_cache_lookup(num)
+    fibonacci = [a, b]
+    for i in range(2, num - k + 2):
         fibonacci.append(fibonacci[i - 1] + fibonacci[i - 2])
-    return fibonacci[num]
+    fib_cache_store(num, fibonacci[num - k], fibonacci[num - k + 1])
+    return fibonacci[num - k]
 
 
 # Fourth Method = Eigen
-@exec_time('EIGEN_METHOD')
 def eigen_fib(n: int) -> int:
     f1 = np.array(([1, 1], [1, 0]))
     eigenvalues, eigenvectors = np.linalg.eig(f1)
@@ -136,7 +230,6 @@ def eigen_fib(n: int) -> int:
 
 
 # Fifth Method = Eigen Optimized
-@exec_time('EIGEN_OPTIMIZED')
 def eigen_fib_optimized(n: int) -> int:
     multiply = lambda a, b, x, y: (x * (a + b) + a * y, a * x + b * y)
     square = lambda a, b: ((a * a) + ((a * b) << 1), a * a + b * b)
@@ -159,13 +252,18 @@ def eigen_fib_optimized(n: int) -> int:
 
             return multiply(x, y, a, b)
 
-    res, _ = power(1, 0, n)
+    # power works on pairs (F(m), F(m - 1)); combine the cached (F(k), F(k - 1))
+    # with the remaining n - k steps
+    k, a, b = fib_cache_lookup(n)
+    x, y = power(1, 0, n - k)
+    res, prev = multiply(a, b - a, x, y)
+
+    fib_cache_store(n, res, res + prev)
 
     return res
 
 
 # Sixth Method = Golden Ratio
-@exec_time('GOLDEN_RATIO_METHOD')
 def golden_ratio_fib(n: int) -> int:
     sqrt_of_five = 2.23606797749979
     phi = (1 + sqrt_of_five) / 2
@@ -174,35 +272,235 @@ def golden_ratio_fib(n: int) -> int:
     return int((phi ** n - inv_phi ** n) / sqrt_of_five)
 
 
-print('\n1. Dynamic Method:')
-for value in values:
-    fibonacci_dynamic(value)
+# Fast doubling engine (exact, big integers)
+# Uses the same squaring identities as eigen_fib_optimized, but written as
+#   F(2k)   = F(k) * (2 * F(k + 1) - F(k))
+#   F(2k+1) = F(k) ** 2 + F(k + 1) ** 2
+# and walks the bits of n from the most significant one, so there is no recursion.
+# Returns the pair (F(n), F(n + 1)); it stays exact for n in the millions.
+def fast_doubling_fib_pair(n: int) -> tuple:
+    if n < 0:
+        raise ValueError(f'n must be non-negative, got {n}')
+
+    a, b = 0, 1  # (F(0), F(1))
+    for bit in bin(n)[2:]:
+        c = a * ((b << 1) - a)  # F(2k)
+        d = a * a + b * b       # F(2k + 1)
+        if bit == '1':
+            a, b = d, c + d
+        else:
+            a, b = c, d
+
+    return a, b
+
+
+# Seventh Method = Fast Doubling
+def fast_doubling_fib(n: int) -> int:
+    k, a, b = fib_cache_lookup(n)
+    if k == n:
+        return a
 
-print('\n2. Iterative:')
-for value in values:
-    iterative_fib(value)
+    # F(k + d) = F(k) * F(d + 1) + F(k - 1) * F(d)
+    x, y = fast_doubling_fib_pair(n - k)
+    res, nxt = a * y + (b - a) * x, b * y + a * x
 
-print('\n3. Iterative with memoization:')
-for value in values:
-    iterative_fib_with_memoization(value)
+    fib_cache_store(n, res, nxt)
 
-print('\n4. Eigenvectors:')
-for value in values:
-    eigen_fib(value)
+    return res
 
-print('\n5. Eigenvectors (optimized):')
-for value in values:
-    eigen_fib_optimized(value)
 
-print('\n6. Golden Ratio:')
-for value in values:
-    golden_ratio_fib(value)
+# Batched API: many terms in one pass
+# The requested indices are sorted and the sequence is walked only once.
+# When the next index is far away, walking term by term costs more than a
+# fast doubling jump (about log2(n) big multiplications), so we jump instead.
+# Like the single-term methods it shares fib_cache: before each index the walk
+# moves ahead to a cached term if one is closer, and every answer is stored.
+# Answers are returned in the same order as ns.
+def fib_many(ns) -> list:
+    ns = list(ns)
+    if not ns:
+        return []
+    if min(ns) < 0:
+        raise ValueError('all indices must be non-negative')
+
+    answers = dict()
+    k, a, b = 0, 0, 1  # a = F(k), b = F(k + 1)
+    for target in sorted(set(ns)):
+        cached_k, cached_a, cached_b = fib_cache_lookup(target)
+        if cached_k > k:
+            k, a, b = cached_k, cached_a, cached_b
+        gap = target - k
+        if gap > 4 * gap.bit_length():
+            # F(k + d) = F(k) * F(d + 1) + F(k - 1) * F(d)
+            x, y = fast_doubling_fib_pair(gap)
+            a, b = a * y + (b - a) * x, b * y + a * x
+        else:
+            for _ in range(gap):
+                a, b = b, a + b
+        k = target
+        answers[target] = a
+        fib_cache_store(k, a, b)
+
+    return [answers[n] for n in ns]
+
+
+# F(93) is the largest term that fits in uint64
+NUMPY_MAX_INDEX = 93
+_numpy_fib_table = None
+
+
+# Vectorized batch for small indices: one gather from a precomputed uint64 table
+def fib_many_numpy(ns) -> np.ndarray:
+    global _numpy_fib_table
+    if _numpy_fib_table is None:
+        terms = [0, 1]
+        for _ in range(NUMPY_MAX_INDEX - 1):
+            terms.append(terms[-1] + terms[-2])
+        _numpy_fib_table = np.array(terms, dtype=np.uint64)
+
+    idx = np.asarray(ns, dtype=np.int64)
+    if idx.size and (idx.min() < 0 or idx.max() > NUMPY_MAX_INDEX):
+        raise ValueError(f'indices must be in [0, {NUMPY_MAX_INDEX}] for the NumPy path')
+
+    return _numpy_fib_table[idx]
+
+
+# Modular mode: F(n) mod m
+# Same fast doubling as above, but every product is reduced mod m, so the
+# numbers never grow past m ** 2 even for n around 10 ** 18.
+def fast_doubling_fib_mod(n: int, m: int) -> int:
+    if n < 0:
+        raise ValueError(f'n must be non-negative, got {n}')
+    if m < 1:
+        raise ValueError(f'modulus must be positive, got {m}')
+
+    a, b = 0, 1 % m
+    for bit in bin(n)[2:]:
+        c = a * ((b << 1) - a) % m
+        d = (a * a + b * b) % m
+        if bit == '1':
+            a, b = d, (c + d) % m
+        else:
+            a, b = c, d
+
+    return a
+
+
+# The sequence F(i) mod m is periodic (Pisano period, at most 6 * m),
+# so after one pass over a period every query for that modulus is a lookup.
+# Tables are kept per modulus and shared by all queries, least recently used
+# first out once they take more than PISANO_CACHE_MAX_BYTES (a table larger
+# than that is used but not kept); moduli above PISANO_MAX_MODULUS always use
+# fast doubling. Values are below m, so 4-byte items are enough.
+PISANO_MAX_MODULUS = 10 ** 6
+PISANO_CACHE_MAX_BYTES = 32 * 1024 * 1024
+pisano_tables = OrderedDict()
+pisano_tables_bytes = 0
+
+
+def pisano_table(m: int) -> array:
+    global pisano_tables_bytes
+    if m in pisano_tables:
+        pisano_tables.move_to_end(m)
+        return pisano_tables[m]
+    if m < 1:
+        raise ValueError(f'modulus must be positive, got {m}')
+
+    table = array('i', [0])
+    a, b = 0, 1 % m
+    # the period ends when the pair (0, 1) comes back
+    for _ in range(6 * m):
+        a, b = b, (a + b) % m
+        if a == 0 and b == 1 % m:
+            break
+        table.append(a)
+
+    size = len(table) * table.itemsize
+    if size <= PISANO_CACHE_MAX_BYTES:
+        pisano_tables[m] = table
+        pisano_tables_bytes += size
+        while pisano_tables_bytes > PISANO_CACHE_MAX_BYTES:
+            _, old = pisano_tables.popitem(last=False)
+            pisano_tables_bytes -= len(old) * old.itemsize
+    return table
+
+
+def fib_mod(n: int, m: int, use_pisano: bool = False) -> int:
+    if use_pisano and m <= PISANO_MAX_MODULUS:
+        if n < 0:
+            raise ValueError(f'n must be non-negative, got {n}')
+        table = pisano_table(m)
+        return table[n % len(table)]
+
+    return fast_doubling_fib_mod(n, m)
+
+
+# Batch queries over one modulus can share a single Pisano precompute.
+# Building the table costs one step per term of the period (typically m to
+# 6 * m), fast doubling one step per bit of n, and a table step is a bit
+# cheaper (measured: about 160 ns against 275 ns), so with use_pisano=None the
+# table is used when it is already built or when the batch has more than
+# PISANO_AUTO_FACTOR * m bits of indices in total.
+PISANO_AUTO_FACTOR = 2
+
+
+def fib_mod_many(ns, m: int, use_pisano: bool = None) -> list:
+    ns = list(ns)
+    if use_pisano is None:
+        use_pisano = m in pisano_tables or sum(n.bit_length() for n in ns) > PISANO_AUTO_FACTOR * m
+    if use_pisano and m <= PISANO_MAX_MODULUS:
+        return [fib_mod(n, m, use_pisano=True) for n in ns]
+
+    return [fast_doubling_fib_mod(n, m) for n in ns]
+
+
+methods = [
+    ('1. Dynamic Method', 'DYNAMIC_METHOD', fibonacci_dynamic),
+    ('2. Iterative', 'ITERATIVE_METHOD', iterative_fib),
+    ('3. Iterative with memoization', 'ITERATIVE MEMOIZATION', iterative_fib_with_memoization),
+    ('4. Eigenvectors', 'EIGEN_METHOD', eigen_fib),
+    ('5. Eigenvectors (optimized)', 'EIGEN_OPTIMIZED', eigen_fib_optimized),
+    ('6. Golden Ratio', 'GOLDEN_RATIO_METHOD', golden_ratio_fib),
+    ('7. Fast Doubling', 'FAST_DOUBLING_METHOD', fast_doubling_fib),
+]
+
+# time the algorithms themselves: with the cache on, repeated calls would only measure lookups
+fib_cache_enabled = False
+results = BenchmarkResults()
+
+for title, name, func in methods:
+    print(f'\n{title}:')
+    for value in values:
+        timing = measure(func, value, name)
+        results.add(timing)
+        print(
+            f'Result for the input  {Red}{value}{END}: '
+            f'min {Red}{round(timing.min * 10 ** 6, 4)}{END}, '
+            f'median {Red}{round(timing.median * 10 ** 6, 4)}{END}, '
+            f'IQR {round(timing.iqr * 10 ** 6, 4)} microseconds '
+            f'({timing.loops} calls per sample).')
+
+# how the shared cache behaves for a sweep over values, one cold cache per method
+fib_cache_enabled = True
+print('\nCache statistics:')
+for title, name, func in methods:
+    if name in ('EIGEN_METHOD', 'GOLDEN_RATIO_METHOD'):
+        continue
+    fib_cache_clear()
+    for value in values:
+        func(value)
+    print(f'{name}: {fib_cache_stats}')
+
+print('\n8. Batched (one pass over all values):')
+fib_cache_clear()
+print(f'Results for the inputs {values}: {Red}{fib_many(values)}{END}')
+print(f'BATCHED: {fib_cache_stats}')
 
 # find the fastest method
-mean_times = running_time.copy()
+mean_times = dict()
 
-for key in mean_times.keys():
-    mean_times[key] = np.mean(np.array(mean_times[key]))
+for key in results.names():
+    mean_times[key] = np.mean(np.array(results.medians_us(key)))
 
 mean_times = {k: v for k, v in sorted(mean_times.items(), key=lambda item: item[1])}
 
@@ -210,10 +508,10 @@ print(f'\n {Red} Algorithms ranking (for 1-80 values): {END}')
 for i, key in enumerate(mean_times.keys()):
     print(f'{i + 1}: {Blue}{key}{END} = {Yellow}{mean_times[key]}{END} microseconds.')
 
-plot_result()
-del running_time['EIGEN_METHOD']
-plot_result()
-del running_time['DYNAMIC_METHOD']
-plot_result()
-del running_time['EIGEN_OPTIMIZED']
-plot_result()
+plot_result(results)
+results.remove('EIGEN_METHOD')
+plot_result(results)
+results.remove('DYNAMIC_METHOD')
+plot_result(results)
+results.remove('EIGEN_OPTIMIZED')
+plot_result(results)
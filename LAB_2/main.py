@@ -1,6 +1,15 @@
+import heapq
+import itertools
+import math
+import os
 import random
+import tempfile
+import numpy as np
 import matplotlib.pyplot as plt
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
 # ANSI color codes for pretty printing
 Red = '\033[91m'
@@ -48,6 +57,129 @@ def merge_sort(a):
             k += 1
 
 
+# Insertion sort of arr[lo:hi], used for short runs
+def insertion_sort_range(arr, lo, hi):
+    for i in range(lo + 1, hi):
+        x = arr[i]
+        j = i - 1
+        while j >= lo and arr[j] > x:
+            arr[j + 1] = arr[j]
+            j -= 1
+        arr[j + 1] = x
+
+
+# Merge the sorted runs src[lo:mid] and src[mid:hi] into dst[lo:hi]
+def merge_runs(src, dst, lo, mid, hi):
+    i, j, k = lo, mid, lo
+    # the runs are already in order, just copy them over
+    if src[mid - 1] <= src[mid]:
+        for k in range(lo, hi):
+            dst[k] = src[k]
+        return
+
+    while i < mid and j < hi:
+        if src[i] <= src[j]:
+            dst[k] = src[i]
+            i += 1
+        else:
+            dst[k] = src[j]
+            j += 1
+        k += 1
+
+    while i < mid:
+        dst[k] = src[i]
+        i += 1
+        k += 1
+
+    while j < hi:
+        dst[k] = src[j]
+        j += 1
+        k += 1
+
+
+# Merge Sort (buffered, in place)
+# Bottom-up merge sort with one auxiliary buffer for the whole sort.
+# Runs of MERGE_INSERTION_CUTOFF elements are insertion sorted first, then
+# every pass merges pairs of runs from src into dst and the two swap roles
+# (ping-pong), so no lists are sliced or copied per level.
+# A buffer of at least len(arr) can be passed in to reuse it between calls.
+# Sorts arr in place and also returns it.
+MERGE_INSERTION_CUTOFF = 32
+
+
+def merge_sort_buffered(arr, buffer=None):
+    n = len(arr)
+    if buffer is None or len(buffer) < n:
+        buffer = [None] * n
+
+    for lo in range(0, n, MERGE_INSERTION_CUTOFF):
+        insertion_sort_range(arr, lo, min(lo + MERGE_INSERTION_CUTOFF, n))
+
+    src, dst = arr, buffer
+    width = MERGE_INSERTION_CUTOFF
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            if mid < hi:
+                merge_runs(src, dst, lo, mid, hi)
+            else:
+                # a lone run at the end still has to reach dst
+                for k in range(lo, hi):
+                    dst[k] = src[k]
+        src, dst = dst, src
+        width *= 2
+
+    # after an odd number of passes the result sits in the buffer
+    if src is not arr:
+        arr[:] = src if len(src) == n else src[:n]
+
+    return arr
+
+
+# Natural Merge Sort
+# Uses the runs already present in the input: ascending runs are kept,
+# strictly descending ones are reversed in place (which keeps it stable), and
+# neighbouring runs are merged pairwise with the same ping-pong buffer as
+# merge_sort_buffered. Nearly sorted input with r runs costs O(n log r).
+# Sorts arr in place and also returns it.
+def natural_merge_sort(arr):
+    n = len(arr)
+    bounds = [0]
+    i = 0
+    while i < n:
+        j = i + 1
+        if j < n and arr[j] < arr[i]:
+            while j < n and arr[j] < arr[j - 1]:
+                j += 1
+            arr[i:j] = arr[i:j][::-1]
+        else:
+            while j < n and arr[j] >= arr[j - 1]:
+                j += 1
+        bounds.append(j)
+        i = j
+
+    src, dst = arr, [None] * n
+    while len(bounds) > 2:
+        merged = [0]
+        for k in range(0, len(bounds) - 1, 2):
+            lo, mid = bounds[k], bounds[k + 1]
+            hi = bounds[k + 2] if k + 2 < len(bounds) else mid
+            if mid < hi:
+                merge_runs(src, dst, lo, mid, hi)
+            else:
+                for t in range(lo, hi):
+                    dst[t] = src[t]
+            merged.append(hi)
+        bounds = merged
+        src, dst = dst, src
+
+    if src is not arr:
+        arr[:] = src
+
+    return arr
+
+
 # Quick Sort
 def quicksort(arr):
     # the array is already sorted and can be returned
@@ -70,6 +202,106 @@ def quicksort(arr):
     return quicksort(left) + equal + quicksort(right)
 
 
+# index of the median of arr[i], arr[j], arr[k]
+def median_of_three(arr, i, j, k):
+    a, b, c = arr[i], arr[j], arr[k]
+    if a < b:
+        if b < c:
+            return j
+        return k if a < c else i
+    if a < c:
+        return i
+    return k if b < c else j
+
+
+# median-of-three for short ranges, Tukey's ninther for long ones
+def choose_pivot(arr, lo, hi):
+    n = hi - lo
+    mid = lo + n // 2
+    if n > 40:
+        step = n // 8
+        a = median_of_three(arr, lo, lo + step, lo + 2 * step)
+        b = median_of_three(arr, mid - step, mid, mid + step)
+        c = median_of_three(arr, hi - 1 - 2 * step, hi - 1 - step, hi - 1)
+        return median_of_three(arr, a, b, c)
+    return median_of_three(arr, lo, mid, hi - 1)
+
+
+# In-place heap sort of arr[lo:hi] with an iterative sift-down
+def heap_sort_range(arr, lo, hi):
+    n = hi - lo
+
+    def sift_down(root, end):
+        x = arr[lo + root]
+        child = 2 * root + 1
+        while child < end:
+            if child + 1 < end and arr[lo + child + 1] > arr[lo + child]:
+                child += 1
+            if arr[lo + child] <= x:
+                break
+            arr[lo + root] = arr[lo + child]
+            root = child
+            child = 2 * root + 1
+        arr[lo + root] = x
+
+    for i in range(n // 2 - 1, -1, -1):
+        sift_down(i, n)
+    for end in range(n - 1, 0, -1):
+        arr[lo], arr[lo + end] = arr[lo + end], arr[lo]
+        sift_down(0, end)
+
+
+# Quick Sort (three-way, in place, introsort)
+# Dutch national flag partition around a median-of-three / ninther pivot,
+# so runs of equal keys are finished in one pass. Pending ranges live on an
+# explicit stack and the smaller side is always processed first, which keeps
+# the stack at O(log n). A range deeper than 2 * log2(n) falls back to heap
+# sort, and short ranges are insertion sorted. Sorts arr in place and returns it.
+QUICK_INSERTION_CUTOFF = 16
+
+
+def quicksort_inplace(arr):
+    n = len(arr)
+    if n < 2:
+        return arr
+
+    max_depth = 2 * int(math.log2(n))
+    stack = [(0, n, 0)]
+    while stack:
+        lo, hi, depth = stack.pop()
+        if hi - lo <= QUICK_INSERTION_CUTOFF:
+            insertion_sort_range(arr, lo, hi)
+            continue
+        if depth > max_depth:
+            heap_sort_range(arr, lo, hi)
+            continue
+
+        # arr[lo:lt] < pivot, arr[lt:i] == pivot, arr[gt:hi] > pivot
+        pivot = arr[choose_pivot(arr, lo, hi)]
+        lt, i, gt = lo, lo, hi
+        while i < gt:
+            x = arr[i]
+            if x < pivot:
+                arr[lt], arr[i] = x, arr[lt]
+                lt += 1
+                i += 1
+            elif x > pivot:
+                gt -= 1
+                arr[gt], arr[i] = x, arr[gt]
+            else:
+                i += 1
+
+        # push the larger side first so the smaller one is popped next
+        if lt - lo < hi - gt:
+            stack.append((gt, hi, depth + 1))
+            stack.append((lo, lt, depth + 1))
+        else:
+            stack.append((lo, lt, depth + 1))
+            stack.append((gt, hi, depth + 1))
+
+    return arr
+
+
 # Heap Sort
 def heap_sort(arr):
     # Build a max heap from the input array
@@ -111,8 +343,118 @@ def heap_sort(arr):
     return arr
 
 
+# Heap Sort (selectable variant)
+# 'recursive'  - the original heap_sort above
+# 'iterative'  - binary heap, sift-down as a loop that moves a hole instead of swapping
+# 'bottom_up'  - Floyd's heapsort: walk the hole down to a leaf along the larger
+#                child (one comparison per level), then sift the element back up;
+#                the element usually belongs near the bottom, so this is short
+# 'quaternary' - 4-ary heap: half the levels of a binary heap, and the four
+#                children sit next to each other in the list
+# Returns a sorted copy, like heap_sort.
+HEAP_VARIANTS = ('recursive', 'iterative', 'bottom_up', 'quaternary')
+
+
+def heap_sort_variant(arr, variant='iterative'):
+    if variant == 'recursive':
+        return heap_sort(arr)
+    if variant not in HEAP_VARIANTS:
+        raise ValueError(f"unknown heap sort variant {variant!r}, expected one of {HEAP_VARIANTS}")
+
+    arr = arr.copy()
+    n = len(arr)
+
+    if variant == 'iterative':
+        heap_sort_range(arr, 0, n)
+        return arr
+
+    def sift_down_bottom_up(root, end):
+        x = arr[root]
+        start = root
+        child = 2 * root + 1
+        # move the hole down to a leaf, always taking the larger child
+        while child < end:
+            if child + 1 < end and arr[child + 1] > arr[child]:
+                child += 1
+            arr[root] = arr[child]
+            root = child
+            child = 2 * root + 1
+        # then sift x up from that leaf
+        while root > start:
+            parent = (root - 1) // 2
+            if arr[parent] >= x:
+                break
+            arr[root] = arr[parent]
+            root = parent
+        arr[root] = x
+
+    def sift_down_quaternary(root, end):
+        x = arr[root]
+        child = 4 * root + 1
+        while child < end:
+            # find the largest of up to four children (a small tournament
+            # when all four exist, a scan for the last partial group)
+            if child + 3 < end:
+                left = child if arr[child] >= arr[child + 1] else child + 1
+                right = child + 2 if arr[child + 2] >= arr[child + 3] else child + 3
+                largest = left if arr[left] >= arr[right] else right
+            else:
+                largest = child
+                for c in range(child + 1, end):
+                    if arr[c] > arr[largest]:
+                        largest = c
+            if arr[largest] <= x:
+                break
+            arr[root] = arr[largest]
+            root = largest
+            child = 4 * root + 1
+        arr[root] = x
+
+    if variant == 'bottom_up':
+        sift_down, last_parent = sift_down_bottom_up, n // 2 - 1
+    else:
+        sift_down, last_parent = sift_down_quaternary, (n - 2) // 4
+
+    for i in range(last_parent, -1, -1):
+        sift_down(i, n)
+    for end in range(n - 1, 0, -1):
+        arr[0], arr[end] = arr[end], arr[0]
+        sift_down(0, end)
+    return arr
+
+
+# Runs every heap sort variant on the same arrays and plots them together
+def compare_heap_sorts(x, array_list):
+    print(Blue + "{:<12s} {:>6s} {:>10s}".format("Variant", "Size", "Time") + Default)
+    for variant in HEAP_VARIANTS:
+        y = []
+        for size, arr in zip(x, array_list):
+            t = round(measure_time(lambda a: heap_sort_variant(a, variant), arr), 5)
+            y.append(t)
+            print(White + "{:<12s} {:>6d} {:>10f}".format(variant, size, t) + Default)
+        plt.plot(x, y, label=variant)
+
+    plt.xlabel("Array Size")
+    plt.ylabel("Time in Seconds")
+    plt.title("Heap Sort Variants")
+    plt.legend()
+    plt.show()
+
+
 # Counting Sort
-def counting_sort(arr):
+# mode='counting' is the classic counting sort and is only exact for integer keys
+# with a small range. 'radix' and 'bucket' stay linear for any real-valued data.
+COUNTING_MODES = ('counting', 'radix', 'bucket')
+
+
+def counting_sort(arr, mode='counting'):
+    if mode == 'radix':
+        return radix_sort(arr)
+    if mode == 'bucket':
+        return bucket_sort(arr)
+    if mode != 'counting':
+        raise ValueError(f"unknown counting sort mode {mode!r}, expected one of {COUNTING_MODES}")
+
     # Find the range of the input array
     max_val = float('-inf')
     min_val = float('inf')
@@ -142,6 +484,381 @@ def counting_sort(arr):
     return sorted_arr
 
 
+# Radix Sort (LSD over IEEE-754 bit patterns)
+# A float64 is turned into an unsigned 64-bit key with the same order:
+# for non-negative numbers the sign bit is set, for negative ones all bits
+# are flipped. The keys are then sorted in four stable passes over 16-bit
+# digits. A stable argsort of uint16 digits is a counting sort inside NumPy,
+# so every pass is linear and vectorized, and memory stays O(n) no matter
+# how wide the key range is.
+RADIX_DIGIT_BITS = 16
+
+
+def radix_sort(arr):
+    values = np.asarray(arr, dtype=np.float64)
+    bits = values.view(np.uint64)
+    sign = np.uint64(1 << 63)
+    keys = np.where(bits & sign, ~bits, bits | sign)
+
+    digit_mask = np.uint64((1 << RADIX_DIGIT_BITS) - 1)
+    for shift in range(0, 64, RADIX_DIGIT_BITS):
+        digits = ((keys >> np.uint64(shift)) & digit_mask).astype(np.uint16)
+        keys = keys[np.argsort(digits, kind='stable')]
+
+    # undo the key mapping
+    bits = np.where(keys & sign, keys ^ sign, ~keys)
+    result = bits.view(np.float64)
+    return result.tolist() if isinstance(arr, list) else result
+
+
+# Bucket Sort (for uniformly distributed data)
+# One bucket per element over [min, max]. Elements are placed with a counting
+# pass over bucket ids into one flat output list (no list per bucket), then each
+# bucket is insertion sorted in place. For uniform data a bucket holds O(1)
+# elements on average, so this is linear time with O(n) extra memory.
+def bucket_sort(arr):
+    n = len(arr)
+    out = list(arr)
+    if n < 2:
+        return out
+    lo, hi = min(out), max(out)
+    if lo == hi:
+        return out
+    width = hi - lo
+    # infinities, or a range wider than the largest float, have no uniform buckets
+    if math.isinf(width):
+        return radix_sort(out)
+
+    ids = [min(int((x - lo) / width * (n - 1)), n - 1) for x in out]
+
+    # starts[b] is the first slot of bucket b
+    starts = [0] * (n + 1)
+    for b in ids:
+        starts[b + 1] += 1
+    for b in range(n):
+        starts[b + 1] += starts[b]
+
+    slot = starts[:n]
+    for x, b in zip(arr, ids):
+        out[slot[b]] = x
+        slot[b] += 1
+
+    for b in range(n):
+        if starts[b + 1] - starts[b] > 1:
+            insertion_sort_range(out, starts[b], starts[b + 1])
+
+    return out
+
+
+# NumPy backend
+# The sorts below work directly on a float64 buffer instead of a list of
+# boxed floats (8 bytes per element instead of a pointer plus a float object).
+# radix_sort above already works on arrays; these add a vectorized counting
+# sort and a block merge sort.
+
+# Counting sort over integer-valued arrays: one bincount and one repeat.
+# Falls back to radix_sort for fractional keys, or when the key range is much
+# wider than the array, so memory stays O(n).
+def counting_sort_np(arr):
+    values = np.asarray(arr, dtype=np.float64)
+    if values.size == 0:
+        return values.copy()
+    lo, hi = values.min(), values.max()
+    if hi - lo > 4 * values.size or not np.array_equal(values, np.floor(values)):
+        return radix_sort(values)
+
+    counts = np.bincount((values - lo).astype(np.int64), minlength=int(hi - lo) + 1)
+    return np.repeat(np.arange(lo, hi + 1, dtype=np.float64), counts)
+
+
+# Merge sorted a and b into out (len(a) + len(b) slots) without a Python loop:
+# searchsorted gives, for every element, how many elements of the other run go
+# before it. Ties keep a before b, so the merge is stable.
+def merge_np(a, b, out):
+    pos_a = np.arange(a.size) + np.searchsorted(b, a, side='left')
+    pos_b = np.arange(b.size) + np.searchsorted(a, b, side='right')
+    out[pos_a] = a
+    out[pos_b] = b
+
+
+# Block merge sort: blocks of MERGE_NP_BLOCK elements are sorted together as
+# rows of a 2-D view, then bottom-up passes merge neighbouring runs with
+# merge_np, ping-ponging between the array and one preallocated buffer.
+MERGE_NP_BLOCK = 4096
+
+
+def merge_sort_np(arr):
+    src = np.array(arr, dtype=np.float64)
+    n = src.size
+    block = MERGE_NP_BLOCK
+
+    full = n - n % block
+    src[:full].reshape(-1, block).sort(axis=1)
+    src[full:].sort()
+
+    dst = np.empty_like(src)
+    width = block
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            merge_np(src[lo:mid], src[mid:hi], dst[lo:hi])
+        src, dst = dst, src
+        width *= 2
+
+    return src
+
+
+# Parallel Sort
+# The input is converted once to int64 (integer input) or float64, and both the
+# serial and the parallel path sort those values, so the result type never
+# depends on the input size; other inputs, or integers outside int64, raise
+# TypeError. For the parallel path the values are copied into a shared memory
+# buffer of that dtype. Each worker in a ProcessPoolExecutor attaches to it by
+# name and sorts its own contiguous chunk in place, so only the buffer name,
+# dtype and chunk bounds are pickled.
+# The sorted chunks are then combined with a k-way heap merge (heapq.merge).
+# Below `cutoff` elements, or with a single worker, the process start-up costs
+# more than it saves, so the sort stays serial.
+PARALLEL_CUTOFF = 200000
+PARALLEL_ALGORITHMS = {
+    'merge': merge_sort_buffered,
+    'heap': lambda chunk: heap_sort_variant(chunk, 'bottom_up'),
+}
+
+
+def sort_shared_chunk(shm_name, n, dtype, lo, hi, algorithm):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray((n,), dtype=dtype, buffer=shm.buf)
+        data[lo:hi] = PARALLEL_ALGORITHMS[algorithm](data[lo:hi].tolist())
+        del data  # release the view before closing the shared block
+    finally:
+        shm.close()
+
+
+def parallel_sort(arr, workers=None, algorithm='merge', cutoff=PARALLEL_CUTOFF):
+    if algorithm not in PARALLEL_ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {tuple(PARALLEL_ALGORITHMS)}")
+    values = np.asarray(arr)
+    if values.size == 0:
+        return []
+    if values.dtype.kind in 'iu' and values.dtype != np.uint64:
+        values = values.astype(np.int64)
+    elif values.dtype.kind == 'f':
+        values = values.astype(np.float64)
+    else:
+        raise TypeError(f"parallel_sort needs int64 or float values, got {values.dtype}")
+    n = len(values)
+    workers = workers or os.cpu_count() or 1
+    if n < cutoff or n < workers or workers < 2:
+        return PARALLEL_ALGORITHMS[algorithm](values.tolist())
+
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    try:
+        data = np.ndarray((n,), dtype=values.dtype, buffer=shm.buf)
+        data[:] = values
+        del values
+
+        bounds = [n * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # consume the results so worker errors are raised here
+            list(pool.map(sort_shared_chunk, [shm.name] * workers, [n] * workers, [data.dtype] * workers,
+                          bounds[:-1], bounds[1:], [algorithm] * workers))
+
+        runs = [data[bounds[i]:bounds[i + 1]].tolist() for i in range(workers)]
+        del data
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return list(heapq.merge(*runs))
+
+
+# External Sort (for files larger than RAM)
+# Phase 1 (run generation): the input is read into one reusable buffer of
+# memory_budget bytes, each filled buffer is sorted and spilled to a temp file
+# of raw float64 values. By default runs are sorted in place with ndarray.sort
+# (no n-sized temporaries). Another run_sort can be passed together with its
+# run_sort_working_set: how many run-sized arrays it holds at its peak, input
+# included (RADIX_SORT_WORKING_SET for radix_sort); runs shrink by that factor.
+# Phase 2 (merge): every run is opened as a read-only memmap and merged in
+# blocks. From each run we look at the next block; every value up to the
+# smallest "last value of a block" is final, so those values are copied into
+# one output buffer of memory_budget bytes, sorted there in place, written out,
+# and each run advances past what it gave. The blocks themselves are only read
+# through the memmaps, never copied.
+# Peak heap memory is therefore about 1x memory_budget in both phases (the
+# output buffer grows to one value per run if there are more runs than fit),
+# plus a few small batches of text lines for the 'text' format.
+# Input and output are either raw float64 ('binary') or one number per line
+# ('text'). progress(phase, done, total) is called after every run and every
+# merged block (total is None when it is not known up front).
+# Returns the number of runs, the number of elements and the time of each phase.
+RADIX_SORT_WORKING_SET = 7
+TEXT_BATCH_LINES = 4096
+
+
+def external_sort(input_path, output_path, memory_budget=64 * 1024 * 1024, fmt='binary',
+                  run_sort=None, run_sort_working_set=1, progress=None, tmp_dir=None):
+    if fmt not in ('binary', 'text'):
+        raise ValueError(f"unknown format {fmt!r}, expected 'binary' or 'text'")
+    capacity = max(1, memory_budget // 8)
+    total = os.path.getsize(input_path) // 8 if fmt == 'binary' else None
+    stats = {'runs': 0, 'elements': 0, 'run_generation_s': 0.0, 'merge_s': 0.0}
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        # phase 1: sorted runs
+        start = time.perf_counter()
+        run_paths = []
+        buffer = np.empty(max(1, capacity // run_sort_working_set), dtype=np.float64)
+        for chunk in read_chunks(input_path, fmt, buffer):
+            path = os.path.join(tmp, f"run_{len(run_paths)}.bin")
+            if run_sort is None:
+                chunk.sort()
+                chunk.tofile(path)
+            else:
+                np.asarray(run_sort(chunk), dtype=np.float64).tofile(path)
+            run_paths.append(path)
+            stats['elements'] += chunk.size
+            if progress:
+                progress('runs', stats['elements'], total)
+        buffer = chunk = None    # the runs are on disk; free the buffer before merging
+        stats['runs'] = len(run_paths)
+        stats['run_generation_s'] = time.perf_counter() - start
+
+        # phase 2: k-way merge over memory mapped runs
+        start = time.perf_counter()
+        block = max(1, capacity // max(1, len(run_paths)))
+        merged = np.empty(max(capacity, len(run_paths)), dtype=np.float64)
+        runs = [np.memmap(path, dtype=np.float64, mode='r') for path in run_paths]
+        positions = [0] * len(runs)
+        written = 0
+        with open(output_path, 'wb' if fmt == 'binary' else 'w') as out:
+            while written < stats['elements']:
+                cutoff = min(run[min(p + block, run.size) - 1] for run, p in zip(runs, positions) if p < run.size)
+                size = 0
+                for i, (run, p) in enumerate(zip(runs, positions)):
+                    if p < run.size:
+                        count = int(np.searchsorted(run[p:p + block], cutoff, side='right'))
+                        merged[size:size + count] = run[p:p + count]
+                        size += count
+                        positions[i] += count
+                merged[:size].sort()
+                if fmt == 'binary':
+                    merged[:size].tofile(out)
+                else:
+                    np.savetxt(out, merged[:size], fmt='%.17g')
+                written += size
+                if progress:
+                    progress('merge', written, stats['elements'])
+        del runs
+        stats['merge_s'] = time.perf_counter() - start
+
+    return stats
+
+
+# Fills buffer from the input file and yields the filled part, until the file
+# ends; every yielded chunk is a view of the same buffer
+def read_chunks(path, fmt, buffer):
+    if fmt == 'binary':
+        raw = memoryview(buffer).cast('B')
+        with open(path, 'rb') as f:
+            while True:
+                filled = 0
+                while filled < len(raw):
+                    read = f.readinto(raw[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled < 8:
+                    return
+                yield buffer[:filled // 8]
+    else:
+        with open(path) as f:
+            while True:
+                filled = 0
+                while filled < buffer.size:
+                    batch = list(itertools.islice(f, min(TEXT_BATCH_LINES, buffer.size - filled)))
+                    if not batch:
+                        break
+                    lines = [line for line in batch if line.strip()]
+                    buffer[filled:filled + len(lines)] = np.array(lines, dtype=np.float64)
+                    filled += len(lines)
+                if filled == 0:
+                    return
+                yield buffer[:filled]
+
+
+# Adaptive Sort
+# sort() looks at the input before choosing an algorithm:
+#   size, number of ascending runs, integer keys and key range are computed
+#   exactly with one vectorized pass over a float64 copy; the duplicate ratio is
+#   estimated from a random sample of ADAPTIVE_SAMPLE_SIZE elements.
+# Rules, in order:
+#   nearly sorted (few runs)              -> natural merge sort
+#   integer keys with a small range       -> counting sort
+#   stable order requested                -> merge sort
+#   everything else                       -> three-way quicksort; its equal-key
+#                                            partition absorbs duplicates, so the
+#                                            duplicate ratio is only recorded, and
+#                                            it falls back to heap sort on bad pivots
+# Every call appends its measurements, the choice and the time spent deciding
+# and sorting to sort_decisions (the last ADAPTIVE_LOG_SIZE calls are kept).
+# Returns a sorted list and leaves arr unchanged.
+ADAPTIVE_SAMPLE_SIZE = 1024
+ADAPTIVE_LOG_SIZE = 1000
+sort_decisions = deque(maxlen=ADAPTIVE_LOG_SIZE)
+
+ADAPTIVE_SORTS = {
+    'natural_merge': natural_merge_sort,
+    'counting': counting_sort,
+    'merge': merge_sort_buffered,
+    'quick': quicksort_inplace,
+}
+
+
+def analyze_input(arr):
+    n = len(arr)
+    values = np.asarray(arr, dtype=np.float64)
+    descents = int(np.count_nonzero(values[1:] < values[:-1])) if n > 1 else 0
+    sample = values[np.random.randint(0, n, ADAPTIVE_SAMPLE_SIZE)] if n > ADAPTIVE_SAMPLE_SIZE else values
+    return {
+        'n': n,
+        'runs': descents + 1 if n else 0,
+        'duplicate_ratio': 1 - np.unique(sample).size / sample.size if sample.size else 0.0,
+        'integer': bool(n) and bool(np.array_equal(values, np.floor(values))),
+        'key_range': float(values.max() - values.min()) if n else 0.0,
+    }
+
+
+def choose_algorithm(features, stable=False):
+    n = features['n']
+    if features['runs'] <= max(1, n // 64):
+        return 'natural_merge'
+    if features['integer'] and features['key_range'] <= 2 * n:
+        return 'counting'
+    if stable:
+        return 'merge'
+    return 'quick'
+
+
+def sort(arr, stable=False):
+    start = time.perf_counter()
+    features = analyze_input(arr)
+    algorithm = choose_algorithm(features, stable)
+    decided = time.perf_counter()
+
+    result = list(arr)
+    if len(result) > 1:
+        result = ADAPTIVE_SORTS[algorithm](result)
+    done = time.perf_counter()
+
+    sort_decisions.append(dict(features, algorithm=algorithm,
+                               analysis_s=decided - start, sort_s=done - decided))
+    return result
+
+
 def generate_random_array(size):
     arr = []
     for i in range(size):
@@ -149,6 +866,12 @@ def generate_random_array(size):
     return arr
 
 
+# same values as generate_random_array, generated straight into a float64 array
+def generate_random_array_np(size, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    return np.round(rng.uniform(-10000, 10000, size), 5)
+
+
 def measure_time(func, arr):
     start = time.time()
     func(arr)
@@ -183,33 +906,135 @@ def show_results(x, array_list, func, title):
     plot_results(x, y, title)
 
 
+# Times the NumPy backend on float64 arrays of the given sizes
+def compare_numpy_sorts(x):
+    sorts = [
+        ("Radix Sort (NumPy)", radix_sort),
+        ("Counting Sort (NumPy)", counting_sort_np),
+        ("Merge Sort (NumPy)", merge_sort_np),
+    ]
+    arrays = [generate_random_array_np(size) for size in x]
+
+    print(Blue + "{:<22s} {:>8s} {:>10s}".format("Algorithm", "Size", "Time") + Default)
+    for title, func in sorts:
+        y = []
+        for size, arr in zip(x, arrays):
+            t = round(measure_time(func, arr), 5)
+            y.append(t)
+            print(White + "{:<22s} {:>8d} {:>10f}".format(title, size, t) + Default)
+        plt.plot(x, y, label=title)
+
+    plt.xlabel("Array Size")
+    plt.ylabel("Time in Seconds")
+    plt.title("NumPy Backend")
+    plt.legend()
+    plt.show()
+
+
+# Serial vs parallel sort for growing worker counts
+def compare_parallel_sorts(sizes, worker_counts):
+    print(Blue + "{:<8s} {:>8s} {:>10s}".format("Workers", "Size", "Time") + Default)
+    for workers in worker_counts:
+        y = []
+        for size in sizes:
+            arr = generate_random_array(size)
+            t = round(measure_time(lambda a: parallel_sort(a, workers=workers, cutoff=0), arr), 5)
+            y.append(t)
+            print(White + "{:<8d} {:>8d} {:>10f}".format(workers, size, t) + Default)
+        plt.plot(sizes, y, label=f"{workers} worker(s)")
+
+    plt.xlabel("Array Size")
+    plt.ylabel("Time in Seconds")
+    plt.title("Parallel Merge Sort")
+    plt.legend()
+    plt.show()
+
+
+# External sort of a generated file with a deliberately small memory budget
+def demo_external_sort(size, memory_budget):
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.bin")
+        output_path = os.path.join(tmp, "output.bin")
+        generate_random_array_np(size).tofile(input_path)
+
+        stats = external_sort(input_path, output_path, memory_budget=memory_budget)
+        result = np.fromfile(output_path, dtype=np.float64)
+        assert np.all(result[:-1] <= result[1:])
+
+    print(Blue + "External sort of {} numbers with a {} byte budget:".format(size, memory_budget) + Default)
+    print(White + "{} runs, run generation {:.5f} s, merge {:.5f} s".format(
+        stats['runs'], stats['run_generation_s'], stats['merge_s']) + Default)
+
+
+# Shows which algorithm the adaptive sort picks for different kinds of input
+def demo_adaptive_sort(size):
+    nearly_sorted = sorted(generate_random_array(size))
+    for _ in range(size // 1000):
+        i, j = random.randrange(size), random.randrange(size)
+        nearly_sorted[i], nearly_sorted[j] = nearly_sorted[j], nearly_sorted[i]
+    inputs = [
+        ("random floats", generate_random_array(size)),
+        ("nearly sorted", nearly_sorted),
+        ("small integers", [random.randint(0, size // 10) for _ in range(size)]),
+        ("many duplicates", [round(random.uniform(0, 10)) * 0.5 for _ in range(size)]),
+    ]
+
+    print(Blue + "{:<16s} {:<14s} {:>10s} {:>10s}".format("Input", "Algorithm", "Analysis", "Sort") + Default)
+    for name, arr in inputs:
+        sort(arr)
+        decision = sort_decisions[-1]
+        print(White + "{:<16s} {:<14s} {:>10f} {:>10f}".format(
+            name, decision['algorithm'], decision['analysis_s'], decision['sort_s']) + Default)
+
+
 def main():
     x = []
     y_merge = []
+    y_merge_buffered = []
     y_quick = []
+    y_quick_inplace = []
     y_heap = []
     y_counting = []
+    y_radix = []
+    y_bucket = []
     arrays = []
     for s in range(500, 6000+1, 500):
         arrays.append(generate_random_array(s))
         x.append(s)
 
+    # the in-place sorts get a copy so every algorithm sees the same input
+    merge_buffered = lambda a: merge_sort_buffered(a[:])
+    quick_inplace = lambda a: quicksort_inplace(a[:])
+
     for i in x:
         arr = arrays[x.index(i)]
         y_merge.append(round((measure_time(merge_sort, arr)), 5))
+        y_merge_buffered.append(round((measure_time(merge_buffered, arr)), 5))
         y_quick.append(round((measure_time(quicksort, arr)), 5))
+        y_quick_inplace.append(round((measure_time(quick_inplace, arr)), 5))
         y_heap.append(round((measure_time(heap_sort, arr)), 5))
         y_counting.append(round((measure_time(counting_sort, arr)), 5))
+        y_radix.append(round((measure_time(radix_sort, arr)), 5))
+        y_bucket.append(round((measure_time(bucket_sort, arr)), 5))
 
     show_results(x, arrays, merge_sort, 'Merge Sort')
+    show_results(x, arrays, merge_buffered, 'Merge Sort (buffered)')
     show_results(x, arrays, quicksort, 'Quick Sort')
+    show_results(x, arrays, quick_inplace, 'Quick Sort (in place)')
     show_results(x, arrays, heap_sort, 'Heap Sort')
+    compare_heap_sorts(x, arrays)
     show_results(x, arrays, counting_sort, 'Counting Sort')
+    show_results(x, arrays, radix_sort, 'Radix Sort')
+    show_results(x, arrays, bucket_sort, 'Bucket Sort')
 
     plt.plot(x, y_merge, label="Merge Sort")
+    plt.plot(x, y_merge_buffered, label="Merge Sort (buffered)")
     plt.plot(x, y_quick, label="Quick Sort")
+    plt.plot(x, y_quick_inplace, label="Quick Sort (in place)")
     plt.plot(x, y_heap, label="Heap Sort")
     plt.plot(x, y_counting, label="Counting Sort")
+    plt.plot(x, y_radix, label="Radix Sort")
+    plt.plot(x, y_bucket, label="Bucket Sort")
 
     plt.xlabel("Array Size")
     plt.ylabel("Time in Seconds")
@@ -217,6 +1042,11 @@ def main():
     plt.legend()
     plt.show()
 
+    compare_numpy_sorts([10 ** 5, 10 ** 6, 10 ** 7])
+    compare_parallel_sorts([10 ** 5, 5 * 10 ** 5, 10 ** 6], [1, 2, os.cpu_count() or 1])
+    demo_external_sort(10 ** 7, 16 * 1024 * 1024)
+    demo_adaptive_sort(10 ** 5)
+
 
 if __name__ == "__main__":
     main()
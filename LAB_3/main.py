@@ -1,6 +1,12 @@
+import mmap
+import os
+import struct
+import tempfile
 import time
 import math
+import numpy as np
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 
 # ANSI color codes for pretty printing
 Red = '\033[91m'
@@ -107,6 +113,89 @@ def algorithm_5(n):
     return c  # Return the list of prime numbers
 
 
+# Segmented sieve (odds only, bit-packed)
+# Only odd numbers are stored, and each finished segment is packed to one bit
+# per odd number (16 numbers per byte instead of 8 bytes per number in a list).
+# Sieving itself happens in one reusable bool scratch buffer of SEGMENT_SIZE
+# slots (about the size of an L2 cache); every base prime p <= sqrt(hi) crosses
+# off its odd multiples in that window starting from max(p * p, first multiple),
+# as one slice assignment. Memory is O(sqrt(n) + segment) whatever n is.
+SEGMENT_SIZE = 1 << 20  # odd numbers per segment
+
+
+# All primes <= limit, from a plain odds-only sieve (used for the base primes)
+def small_primes(limit):
+    if limit < 2:
+        return np.array([], dtype=np.int64)
+    flags = np.ones((limit - 1) // 2, dtype=bool)  # flags[i] stands for 2 * i + 3
+    for i in range((math.isqrt(limit) - 3) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 3
+            flags[(p * p - 3) // 2::p] = False
+    return np.concatenate(([2], 2 * np.nonzero(flags)[0] + 3)).astype(np.int64)
+
+
+# Sieves the odd numbers in [lo, hi) segment by segment.
+# Yields (first, count, bits): bit i of the packed bits (np.packbits order)
+# is set when first + 2 * i is prime, for i < count. 2 is never reported.
+# base can pass in precomputed odd primes up to at least sqrt(hi).
+def sieve_segments(lo, hi, segment_size=SEGMENT_SIZE, base=None):
+    first = max(lo, 3) | 1
+    if first >= hi:
+        return
+    if base is None:
+        base = small_primes(math.isqrt(hi - 1))[1:]
+    flags = np.empty(segment_size, dtype=bool)
+
+    for seg_lo in range(first, hi, 2 * segment_size):
+        seg_hi = min(seg_lo + 2 * segment_size, hi)
+        count = (seg_hi - seg_lo + 1) // 2
+        seg = flags[:count]
+        seg[:] = True
+
+        primes = base[base * base < seg_hi]
+        # first odd multiple of p in the segment, but never below p * p
+        start = np.maximum(primes * primes, (seg_lo + primes - 1) // primes * primes)
+        start = np.where(start % 2 == 0, start + primes, start)
+        for p, i in zip(primes.tolist(), ((start - seg_lo) // 2).tolist()):
+            seg[i::p] = False
+
+        yield seg_lo, count, np.packbits(seg)
+
+
+# Algorithm 6 = segmented sieve
+# Returns the packed bits for all odd numbers 3, 5, ..., n
+# (bit i stands for 2 * i + 3), built one segment at a time.
+def algorithm_6(n):
+    parts = [bits for _, _, bits in sieve_segments(3, n + 1)]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+
+# number of set bits in every possible byte, for popcounts over packed segments
+POPCOUNT_TABLE = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
+
+
+# Primes in [lo, hi), generated lazily one segment at a time.
+# Only the current segment is ever held in memory, whatever the range.
+def primes_in_range(lo, hi, segment_size=SEGMENT_SIZE):
+    if lo <= 2 < hi:
+        yield 2
+    for first, count, bits in sieve_segments(lo, hi, segment_size):
+        offsets = np.nonzero(np.unpackbits(bits, count=count))[0]
+        yield from (first + 2 * offsets).tolist()
+
+
+# Number of primes <= n, counted with a popcount of each packed segment;
+# no list of primes or flags is ever built.
+def prime_count(n, segment_size=SEGMENT_SIZE):
+    if n < 2:
+        return 0
+    total = 1  # the prime 2
+    for _, _, bits in sieve_segments(3, n + 1, segment_size):
+        total += int(POPCOUNT_TABLE[bits].sum())
+    return total
+
+
 def exec_time(function, n):
     start_time = time.time()
     function(n)
@@ -114,82 +203,347 @@ def exec_time(function, n):
     return end_time - start_time
 
 
-n = 5000
-
-first = exec_time(algorithm_1, n)
-second = exec_time(algorithm_2, n)
-third = exec_time(algorithm_3, n)
-fourth = exec_time(algorithm_4, n)
-fifth = exec_time(algorithm_5, n)
-
-print(Green + "Algorithm 1 - " + White, first, "s")
-print(Green + "Algorithm 2 - " + White, second, "s")
-print(Green + "Algorithm 3 - " + White, third, "s")
-print(Green + "Algorithm 4 - " + White, fourth, "s")
-print(Green + "Algorithm 5 - " + White, fifth, "s")
-
-# Create a bar chart with execution times
-labels = ['Algorithm 1', 'Algorithm 2', 'Algorithm 3', 'Algorithm 4', 'Algorithm 5']
-times = [first, second, third, fourth, fifth]
-colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
-plt.bar(labels, times, color=colors)
-plt.ylabel('Execution Time (seconds)')
-plt.title('Execution Time Comparison')
-plt.grid()
-
-for i, v in enumerate(times):
-    plt.text(i, v, f"{v:.4f}", ha='center', va='bottom')
-
-plt.text(0.05, 0.95, f"n={n}", transform=plt.gca().transAxes, ha='left', fontweight='bold',
-         bbox=dict(facecolor='white', edgecolor='black', boxstyle='square'))
-
-plt.show()
-
-Algorithms = [
-    {
-        "name": "Algorithm 1",
-        "alg": lambda n: algorithm_1(n)
-    },
-    {
-        "name": "Algorithm 2",
-        "alg": lambda n: algorithm_2(n)
-    },
-    {
-        "name": "Algorithm 3",
-        "alg": lambda n: algorithm_3(n)
-    },
-    {
-        "name": "Algorithm 4",
-        "alg": lambda n: algorithm_4(n)
-    },
-    {
-        "name": "Algorithm 5",
-        "alg": lambda n: algorithm_5(n)
-    }
-]
-
-times = []
-
-for alg in Algorithms:
-    exec_times = []
-    for i in range(1, 6):
-        exec_t = exec_time(alg["alg"], i * 1000)
-        exec_times.append(exec_t)
-        print(Red + alg["name"] + White, " - ", i * 1000, "elements - ", exec_t, "s")
-    times.append(exec_times)
-
-x_axis = [i * 1000 for i in range(1, 6)]
-
-plt.title('Execution Time Comparison')
-plt.plot(x_axis, times[0], label=Algorithms[0]["name"])
-plt.plot(x_axis, times[1], label=Algorithms[1]["name"])
-plt.plot(x_axis, times[2], label=Algorithms[2]["name"])
-plt.plot(x_axis, times[3], label=Algorithms[3]["name"])
-plt.plot(x_axis, times[4], label=Algorithms[4]["name"])
-
-plt.xlabel('Input = n')
-plt.ylabel('Time ')
-
-plt.grid()
-plt.legend()
-plt.show()
+# Parallel segmented sieve
+# [3, n] is cut into tasks of whole segments and handed to a process pool.
+# The odd base primes up to sqrt(n) are computed once and shipped to every
+# worker through the pool initializer, so no worker sieves them again.
+# mode='count' adds up per-task popcounts; mode='bits' joins the packed
+# per-task bitsets into the same table algorithm_6 returns. Joining packed
+# segments only lines up when every segment fills whole bytes, so 'bits' needs
+# segment_size to be a multiple of 8.
+TASKS_PER_WORKER = 4
+worker_base_primes = None
+
+
+def init_sieve_worker(base):
+    global worker_base_primes
+    worker_base_primes = base
+
+
+def sieve_task(lo, hi, mode, segment_size):
+    total = 0
+    parts = []
+    for _, _, bits in sieve_segments(lo, hi, segment_size, base=worker_base_primes):
+        if mode == 'count':
+            total += int(POPCOUNT_TABLE[bits].sum())
+        else:
+            parts.append(bits)
+    if mode == 'count':
+        return total
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+
+def parallel_sieve(n, workers=None, mode='count', segment_size=SEGMENT_SIZE):
+    if mode not in ('count', 'bits'):
+        raise ValueError(f"unknown mode {mode!r}, expected 'count' or 'bits'")
+    if mode == 'bits' and segment_size % 8:
+        raise ValueError(f"segment_size must be a multiple of 8 in 'bits' mode, got {segment_size}")
+    workers = workers or os.cpu_count() or 1
+    if n < 3:
+        if mode == 'count':
+            return 1 if n == 2 else 0
+        return np.zeros(0, dtype=np.uint8)
+
+    # every task covers a whole number of segments
+    seg_span = 2 * segment_size
+    span = max(1, math.ceil((n - 2) / (TASKS_PER_WORKER * workers) / seg_span)) * seg_span
+    bounds = list(range(3, n + 1, span)) + [n + 1]
+    base = small_primes(math.isqrt(n))[1:]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_sieve_worker, initargs=(base,)) as pool:
+        results = list(pool.map(sieve_task, bounds[:-1], bounds[1:],
+                                [mode] * (len(bounds) - 1), [segment_size] * (len(bounds) - 1)))
+
+    if mode == 'count':
+        return 1 + sum(results)
+    return np.concatenate(results)
+
+
+# Numbers sieved per second for each worker count, for sizing hosts
+def sieve_throughput(n, worker_counts):
+    throughput = dict()
+    for workers in worker_counts:
+        elapsed = exec_time(lambda k: parallel_sieve(k, workers), n)
+        throughput[workers] = n / elapsed
+        print(Red + f"{workers} worker(s)" + White, " - ", f"{throughput[workers]:.3e}", "numbers/s")
+    return throughput
+
+
+# Persistent prime table
+# build_prime_table sieves [3, n] segment by segment and streams the packed
+# odd-number bits to a file, followed by a rank index: for every block of
+# RANK_BLOCK_BYTES bytes, the number of odd primes before that block.
+# PrimeTable memory-maps the file, so a cold start is a page-in instead of a
+# new sieve, and answers:
+#   is_prime(k)    - one bit lookup
+#   count(k)       - primes <= k: one rank entry plus a popcount inside a block
+#   nth_prime(m)   - binary search over the rank index, then a scan of one block
+#   next_prime(k)  - smallest prime > k, as nth_prime(count(k) + 1)
+# Layout: header (PRIME_TABLE_HEADER), bits, rank index (int64).
+PRIME_TABLE_MAGIC = b'PRIMETB1'
+PRIME_TABLE_HEADER = struct.Struct('<8sQQQQ')  # magic, n, bit bytes, block bytes, blocks
+RANK_BLOCK_BYTES = 512
+
+
+def build_prime_table(path, n, block_bytes=RANK_BLOCK_BYTES):
+    # segments hold a multiple of 8 odd numbers, so packed bytes can be appended as they come
+    rank = []
+    primes_before = 0
+    nbytes = 0
+    with open(path, 'wb') as f:
+        f.write(PRIME_TABLE_HEADER.pack(PRIME_TABLE_MAGIC, n, 0, block_bytes, 0))
+        for _, _, bits in sieve_segments(3, n + 1):
+            counts = POPCOUNT_TABLE[bits]
+            before = primes_before + np.cumsum(counts) - counts
+            first_block = -(-nbytes // block_bytes) * block_bytes
+            rank.extend(before[first_block - nbytes::block_bytes].tolist())
+            primes_before += int(counts.sum())
+            nbytes += bits.size
+            f.write(bits.tobytes())
+        f.write(np.array(rank, dtype=np.int64).tobytes())
+        f.seek(0)
+        f.write(PRIME_TABLE_HEADER.pack(PRIME_TABLE_MAGIC, n, nbytes, block_bytes, len(rank)))
+
+
+class PrimeTable:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, nbytes, self.block_bytes, blocks = PRIME_TABLE_HEADER.unpack_from(self.mm)
+        if magic != PRIME_TABLE_MAGIC:
+            raise ValueError(f"{path} is not a prime table")
+        offset = PRIME_TABLE_HEADER.size
+        self.bits = np.frombuffer(self.mm, dtype=np.uint8, count=nbytes, offset=offset)
+        self.rank = np.frombuffer(self.mm, dtype=np.int64, count=blocks, offset=offset + nbytes)
+        self.total = self.count(self.n)
+
+    def close(self):
+        del self.bits, self.rank
+        self.mm.close()
+
+    def check_bound(self, k):
+        if k > self.n:
+            raise ValueError(f"{k} is beyond the table (n = {self.n})")
+
+    def is_prime(self, k):
+        self.check_bound(k)
+        if k < 3 or k % 2 == 0:
+            return k == 2
+        i = (k - 3) // 2
+        return bool(self.bits[i >> 3] >> (7 - (i & 7)) & 1)
+
+    def count(self, k):
+        self.check_bound(k)
+        if k < 3:
+            return 1 if k == 2 else 0
+        i = (k - 3) // 2  # index of the largest odd number <= k
+        byte, bit = i >> 3, i & 7
+        block = byte // self.block_bytes
+        inside = int(POPCOUNT_TABLE[self.bits[block * self.block_bytes:byte]].sum())
+        # the bits of the last byte up to and including bit i
+        last = int(self.bits[byte]) >> (7 - bit)
+        return 1 + int(self.rank[block]) + inside + bin(last).count('1')
+
+    def nth_prime(self, m):
+        if m < 1 or m > self.total:
+            raise ValueError(f"the table holds {self.total} primes, asked for prime number {m}")
+        if m == 1:
+            return 2
+        target = m - 1  # position among the odd primes, 1-based
+        block = int(np.searchsorted(self.rank, target, side='left')) - 1
+        lo = block * self.block_bytes
+        counts = np.cumsum(POPCOUNT_TABLE[self.bits[lo:lo + self.block_bytes]]) + self.rank[block]
+        byte = lo + int(np.searchsorted(counts, target, side='left'))
+        # the remaining primes to skip inside that byte
+        seen = int(counts[byte - lo]) - int(POPCOUNT_TABLE[self.bits[byte]])
+        value = int(self.bits[byte])
+        for bit in range(8):
+            if value >> (7 - bit) & 1:
+                seen += 1
+                if seen == target:
+                    return 2 * (8 * byte + bit) + 3
+
+    def next_prime(self, k):
+        if k < 2:
+            return 2
+        return self.nth_prime(self.count(k) + 1)
+
+
+# Primality of single numbers
+# is_prime(k) picks the cheapest exact path:
+#   k inside a loaded PrimeTable       -> one bit lookup
+#   k < WHEEL_LIMIT                    -> 2*3*5 wheel trial division
+#   otherwise                          -> deterministic Miller-Rabin
+WHEEL_LIMIT = 10 ** 5
+WHEEL_STEPS = (4, 2, 4, 2, 4, 6, 2, 6)  # gaps between numbers coprime to 30, from 7
+
+# with these bases Miller-Rabin has no false positives below 3.18 * 10 ** 23,
+# which covers every 64-bit input
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+# Trial division by 2, 3, 5 and then only by numbers coprime to 30
+# (8 candidates out of every 30); the bound is computed once and the loop
+# stops at the first divisor.
+def is_prime_wheel(k):
+    if k < 2:
+        return False
+    for p in (2, 3, 5):
+        if k % p == 0:
+            return k == p
+    limit = math.isqrt(k)
+    d, step = 7, 0
+    while d <= limit:
+        if k % d == 0:
+            return False
+        d += WHEEL_STEPS[step]
+        step = (step + 1) & 7
+    return True
+
+
+def is_prime_miller_rabin(k):
+    if k < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if k % p == 0:
+            return k == p
+
+    # k - 1 = d * 2 ** s with d odd
+    d, s = k - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, k)
+        if x == 1 or x == k - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % k
+            if x == k - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(k, table=None):
+    if table is not None and k <= table.n:
+        return table.is_prime(k)
+    if k < WHEEL_LIMIT:
+        return is_prime_wheel(k)
+    return is_prime_miller_rabin(k)
+
+
+if __name__ == '__main__':
+    n = 5000
+
+    first = exec_time(algorithm_1, n)
+    second = exec_time(algorithm_2, n)
+    third = exec_time(algorithm_3, n)
+    fourth = exec_time(algorithm_4, n)
+    fifth = exec_time(algorithm_5, n)
+    sixth = exec_time(algorithm_6, n)
+
+    print(Green + "Algorithm 1 - " + White, first, "s")
+    print(Green + "Algorithm 2 - " + White, second, "s")
+    print(Green + "Algorithm 3 - " + White, third, "s")
+    print(Green + "Algorithm 4 - " + White, fourth, "s")
+    print(Green + "Algorithm 5 - " + White, fifth, "s")
+    print(Green + "Algorithm 6 - " + White, sixth, "s")
+
+    # Create a bar chart with execution times
+    labels = ['Algorithm 1', 'Algorithm 2', 'Algorithm 3', 'Algorithm 4', 'Algorithm 5', 'Algorithm 6']
+    times = [first, second, third, fourth, fifth, sixth]
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
+    plt.bar(labels, times, color=colors)
+    plt.ylabel('Execution Time (seconds)')
+    plt.title('Execution Time Comparison')
+    plt.grid()
+
+    for i, v in enumerate(times):
+        plt.text(i, v, f"{v:.4f}", ha='center', va='bottom')
+
+    plt.text(0.05, 0.95, f"n={n}", transform=plt.gca().transAxes, ha='left', fontweight='bold',
+             bbox=dict(facecolor='white', edgecolor='black', boxstyle='square'))
+
+    plt.show()
+
+    Algorithms = [
+        {
+            "name": "Algorithm 1",
+            "alg": lambda n: algorithm_1(n)
+        },
+        {
+            "name": "Algorithm 2",
+            "alg": lambda n: algorithm_2(n)
+        },
+        {
+            "name": "Algorithm 3",
+            "alg": lambda n: algorithm_3(n)
+        },
+        {
+            "name": "Algorithm 4",
+            "alg": lambda n: algorithm_4(n)
+        },
+        {
+            "name": "Algorithm 5",
+            "alg": lambda n: algorithm_5(n)
+        },
+        {
+            "name": "Algorithm 6",
+            "alg": lambda n: algorithm_6(n)
+        }
+    ]
+
+    times = []
+
+    for alg in Algorithms:
+        exec_times = []
+        for i in range(1, 6):
+            exec_t = exec_time(alg["alg"], i * 1000)
+            exec_times.append(exec_t)
+            print(Red + alg["name"] + White, " - ", i * 1000, "elements - ", exec_t, "s")
+        times.append(exec_times)
+
+    x_axis = [i * 1000 for i in range(1, 6)]
+
+    plt.title('Execution Time Comparison')
+    plt.plot(x_axis, times[0], label=Algorithms[0]["name"])
+    plt.plot(x_axis, times[1], label=Algorithms[1]["name"])
+    plt.plot(x_axis, times[2], label=Algorithms[2]["name"])
+    plt.plot(x_axis, times[3], label=Algorithms[3]["name"])
+    plt.plot(x_axis, times[4], label=Algorithms[4]["name"])
+    plt.plot(x_axis, times[5], label=Algorithms[5]["name"])
+
+    plt.xlabel('Input = n')
+    plt.ylabel('Time ')
+
+    plt.grid()
+    plt.legend()
+    plt.show()
+
+    # counting with the segmented sieve never builds the list, so n can be much larger
+    big_n = 10 ** 8
+    count_time = exec_time(prime_count, big_n)
+    print(Green + f"Prime count up to {big_n} - " + White, prime_count(big_n), "primes,", count_time, "s")
+
+    # parallel sieve throughput for 1, 2, ... up to all cores
+    sieve_throughput(big_n, sorted({1, 2, os.cpu_count() or 1}))
+
+    # build the table once, then every later run only maps the file
+    with tempfile.TemporaryDirectory() as tmp:
+        table_path = os.path.join(tmp, "primes.bin")
+        build_time = exec_time(lambda k: build_prime_table(table_path, k), big_n)
+        load_start = time.time()
+        table = PrimeTable(table_path)
+        load_time = time.time() - load_start
+        print(Green + "Prime table build - " + White, build_time, "s,", "load -", load_time, "s")
+        print(Green + "is_prime(99999989) - " + White, table.is_prime(99999989))
+        print(Green + "nth_prime(1000000) - " + White, table.nth_prime(1000000))
+        print(Green + "next_prime(50000000) - " + White, table.next_prime(50000000))
+        table.close()
+
+    # single large numbers, far beyond any sieve bound
+    for k in [2 ** 61 - 1, 2 ** 64 - 59, 2 ** 64 - 1]:
+        print(Green + f"is_prime({k}) - " + White, is_prime(k))
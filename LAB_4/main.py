@@ -1,6 +1,9 @@
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 import time
+from array import array
+from collections import deque
 
 # color for text output
 WARNING = '\033[93m'
@@ -34,26 +37,303 @@ def dfs(visited, graph, node):
         for neighbour in graph[node]:
             # recursively call dfs on the neighbor
             dfs(visited, graph, neighbour)
-queue = []
 
 
 # breadth-first search
 def bfs(graph, node):
-    # create a list to keep track of visited nodes
-    visited = [node]
-    queue.append(node)
+    # create a set to keep track of visited nodes
+    visited = {node}
+    queue = deque([node])
     # while the queue is not empty
     while queue:
         # remove the first element from the queue
-        m = queue.pop(0)
+        m = queue.popleft()
         print(m, end=" ")
         for neighbour in graph[m]:
             if neighbour not in visited:
                 # mark it as visited and add it to the queue
-                visited.append(neighbour)
+                visited.add(neighbour)
                 queue.append(neighbour)
 
 
+# Compressed sparse row (CSR) graph
+# Vertices are numbered 0 .. n-1. The neighbours of u are
+# targets[offsets[u]:offsets[u + 1]], so the whole graph is two flat arrays of
+# 8-byte integers instead of a dict of lists of Python objects.
+# labels[u] is the original name of vertex u and index maps a name back to u.
+class CSRGraph:
+    def __init__(self, offsets, targets, labels=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.num_vertices = len(offsets) - 1
+        self.labels = labels if labels is not None else range(self.num_vertices)
+        self.index = {label: u for u, label in enumerate(self.labels)} if labels is not None else None
+
+    # build from the dict-of-lists form used by `graph` and `graph2`
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        labels = list(adjacency)
+        index = {label: u for u, label in enumerate(labels)}
+        # vertices that only appear as neighbours get the next free ids
+        for neighbours in adjacency.values():
+            for v in neighbours:
+                if v not in index:
+                    index[v] = len(labels)
+                    labels.append(v)
+
+        offsets = array('q', [0])
+        targets = array('q')
+        for label in labels:
+            targets.extend(index[v] for v in adjacency.get(label, ()))
+            offsets.append(len(targets))
+        return cls(offsets, targets, labels)
+
+    # build from parallel arrays of edge endpoints (e.g. large generated graphs)
+    @classmethod
+    def from_edges(cls, num_vertices, sources, destinations):
+        sources = np.asarray(sources, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        order = np.argsort(sources, kind='stable')
+        offsets = np.zeros(num_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_vertices), out=offsets[1:])
+        return cls(array('q', offsets.tobytes()), array('q', destinations[order].tobytes()))
+
+    def vertex(self, label):
+        return self.index[label] if self.index is not None else label
+
+    def neighbours(self, u):
+        return self.targets[self.offsets[u]:self.offsets[u + 1]]
+
+    # the same vertices with every edge reversed (for searching backwards)
+    def transpose(self):
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(self.num_vertices, dtype=np.int64), np.diff(offsets))
+        g = CSRGraph.from_edges(self.num_vertices, np.frombuffer(self.targets, dtype=np.int64), sources)
+        g.labels, g.index = self.labels, self.index
+        return g
+
+
+# breadth-first search over a CSRGraph
+# The BFS order list doubles as the queue (a head index walks along it),
+# and visited is one byte per vertex. Returns the vertex ids in BFS order.
+def bfs_csr(g, source):
+    offsets, targets = g.offsets, g.targets
+    visited = bytearray(g.num_vertices)
+    visited[source] = 1
+    order = [source]
+    head = 0
+    while head < len(order):
+        u = order[head]
+        head += 1
+        for v in targets[offsets[u]:offsets[u + 1]]:
+            if not visited[v]:
+                visited[v] = 1
+                order.append(v)
+    return order
+
+
+# random sparse graph with num_vertices vertices and about degree edges per vertex
+def generate_random_csr(num_vertices, degree, seed=None):
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, num_vertices, num_vertices * degree)
+    destinations = rng.integers(0, num_vertices, num_vertices * degree)
+    return CSRGraph.from_edges(num_vertices, sources, destinations)
+
+
+# shortest hops from several sources at once (one source is the usual case)
+# distance[v] is the number of edges from the nearest source, parent[v] the
+# vertex it was reached from; both are -1 for unreached vertices and parent is
+# -1 for the sources themselves. expanded counts vertices whose neighbours
+# were scanned.
+def bfs_multi_source(g, sources):
+    offsets, targets = g.offsets, g.targets
+    distance = array('q', [-1]) * g.num_vertices
+    parent = array('q', [-1]) * g.num_vertices
+    queue = []
+    for s in sources:
+        if distance[s] < 0:
+            distance[s] = 0
+            queue.append(s)
+    head = 0
+    while head < len(queue):
+        u = queue[head]
+        head += 1
+        du = distance[u] + 1
+        for v in targets[offsets[u]:offsets[u + 1]]:
+            if distance[v] < 0:
+                distance[v] = du
+                parent[v] = u
+                queue.append(v)
+    return {'distance': distance, 'parent': parent, 'expanded': head}
+
+
+def bfs_distances(g, source):
+    return bfs_multi_source(g, [source])
+
+
+# vertex ids from the root of a parent array to v
+def parent_path(parent, v):
+    path = []
+    while v >= 0:
+        path.append(v)
+        v = parent[v]
+    path.reverse()
+    return path
+
+
+# hops from source to target, searching from both ends
+# Each round expands one whole level of whichever frontier is smaller: the
+# forward side follows g, the backward side follows reverse (the transposed
+# graph; pass g itself for undirected graphs). Once a level touches the other
+# side, the best meeting point in that level is a shortest path, so the search
+# stops there. Returns the distance (-1 if unreachable), the path as vertex ids
+# and the number of vertices expanded.
+def bidirectional_bfs(g, source, target, reverse=None):
+    if reverse is None:
+        reverse = g.transpose()
+    if source == target:
+        return {'distance': 0, 'path': [source], 'expanded': 0}
+
+    sides = [
+        (g.offsets, g.targets, {source: -1}, {source: 0}, [source]),
+        (reverse.offsets, reverse.targets, {target: -1}, {target: 0}, [target]),
+    ]
+    expanded = 0
+    while sides[0][4] and sides[1][4]:
+        forward = 0 if len(sides[0][4]) <= len(sides[1][4]) else 1
+        offsets, targets, parent, depth, frontier = sides[forward]
+        other_depth = sides[1 - forward][3]
+        best, meet = -1, None
+        next_frontier = []
+        for u in frontier:
+            du = depth[u] + 1
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if v not in depth:
+                    depth[v] = du
+                    parent[v] = u
+                    next_frontier.append(v)
+                if v in other_depth and (best < 0 or depth[v] + other_depth[v] < best):
+                    best, meet = depth[v] + other_depth[v], v
+        expanded += len(frontier)
+        sides[forward] = (offsets, targets, parent, depth, next_frontier)
+        if meet is not None:
+            path = parent_path(sides[0][2], meet)
+            v = sides[1][2][meet]
+            while v >= 0:
+                path.append(v)
+                v = sides[1][2][v]
+            return {'distance': best, 'path': path, 'expanded': expanded}
+    return {'distance': -1, 'path': [], 'expanded': expanded}
+
+
+# every edge leaving the given vertices, as (owner, neighbour) arrays
+# The edge positions are built with one repeat/cumsum instead of slicing
+# each adjacency list separately.
+def gather_edges(offsets, targets, vertices):
+    starts = offsets[vertices]
+    degrees = offsets[vertices + 1] - starts
+    total = int(degrees.sum())
+    ends = np.cumsum(degrees)
+    positions = np.arange(total, dtype=np.int64) + np.repeat(starts - (ends - degrees), degrees)
+    return np.repeat(vertices, degrees), targets[positions]
+
+
+# level-synchronous BFS with NumPy frontiers (direction-optimizing)
+# A top-down step gathers the out-edges of the whole frontier at once; a
+# bottom-up step gathers the in-edges of every still unvisited vertex and keeps
+# those with a parent in the frontier bitmap. Following Beamer et al., the search
+# goes bottom-up once the frontier's out-edges exceed 1/alpha of the edges left
+# to check from unvisited vertices, and back top-down when the frontier shrinks
+# below 1/beta of the vertices. reverse is the transposed graph (pass g itself
+# for undirected graphs). Returns distance and parent arrays (-1 where unset)
+# and the direction used for each level.
+def bfs_direction_optimizing(g, source, reverse=None, alpha=15, beta=18):
+    if reverse is None:
+        reverse = g.transpose()
+    n = g.num_vertices
+    offsets = np.frombuffer(g.offsets, dtype=np.int64)
+    targets = np.frombuffer(g.targets, dtype=np.int64)
+    in_offsets = np.frombuffer(reverse.offsets, dtype=np.int64)
+    in_targets = np.frombuffer(reverse.targets, dtype=np.int64)
+    out_degree = np.diff(offsets)
+    in_degree = np.diff(in_offsets)
+
+    distance = np.full(n, -1, dtype=np.int64)
+    parent = np.full(n, -1, dtype=np.int64)
+    distance[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    unexplored_edges = int(in_degree.sum()) - int(in_degree[source])
+    steps = []
+    bottom_up = False
+    level = 0
+    while frontier.size:
+        frontier_edges = int(out_degree[frontier].sum())
+        if not bottom_up and frontier_edges > unexplored_edges / alpha:
+            bottom_up = True
+        elif bottom_up and frontier.size < n / beta:
+            bottom_up = False
+        level += 1
+
+        if bottom_up:
+            in_frontier = np.zeros(n, dtype=bool)
+            in_frontier[frontier] = True
+            reached, parents = gather_edges(in_offsets, in_targets, np.flatnonzero(distance < 0))
+            keep = in_frontier[parents]
+        else:
+            parents, reached = gather_edges(offsets, targets, frontier)
+            keep = distance[reached] < 0
+        reached, parents = reached[keep], parents[keep]
+
+        # a vertex may be reached along several edges; keep the first parent
+        frontier, first = np.unique(reached, return_index=True)
+        distance[frontier] = level
+        parent[frontier] = parents[first]
+        unexplored_edges -= int(in_degree[frontier].sum())
+        steps.append('bottom-up' if bottom_up else 'top-down')
+    return {'distance': distance, 'parent': parent, 'steps': steps}
+
+
+# depth-first search (iterative)
+# Visits vertices in the same order as dfs above, but keeps an explicit stack
+# of (vertex, iterator over its remaining neighbours) instead of recursing, so
+# path-shaped graphs of any length work. Nothing is printed; the traversal is
+# returned as preorder and postorder lists plus discovery and finish times
+# (one shared clock that ticks at every discovery and every finish).
+# Works on dict-of-lists graphs and on CSRGraph.
+def dfs_iterative(graph, node):
+    neighbours = graph.neighbours if isinstance(graph, CSRGraph) else graph.__getitem__
+    preorder, postorder = [], []
+    discovery, finish = {}, {}
+    clock = 0
+
+    discovery[node] = clock
+    clock += 1
+    preorder.append(node)
+    stack = [(node, iter(neighbours(node)))]
+    while stack:
+        u, remaining = stack[-1]
+        for v in remaining:
+            if v not in discovery:
+                discovery[v] = clock
+                clock += 1
+                preorder.append(v)
+                stack.append((v, iter(neighbours(v))))
+                break
+        else:
+            # every neighbour of u is done
+            stack.pop()
+            finish[u] = clock
+            clock += 1
+            postorder.append(u)
+
+    return {'preorder': preorder, 'postorder': postorder, 'discovery': discovery, 'finish': finish}
+
+
+# a path 0 -> 1 -> ... -> n-1, the deepest possible tree
+def generate_path_graph(n):
+    return {i: [i + 1] if i + 1 < n else [] for i in range(n)}
+
+
 # define the starting node
 root1 = 'D'
 root2 = 'D'
@@ -97,6 +377,47 @@ if __name__ == '__main__':
     print(f"Total execution time for unbalanced graph with DFS: {total3:.6f} sec")
     print(f"Total execution time for unbalanced graph with BFS: {total4:.6f} sec")
 
+    # the same BFS over the CSR form, then on a large random sparse graph
+    for name, g in [("balanced", graph), ("unbalanced", graph2)]:
+        csr = CSRGraph.from_adjacency(g)
+        order = bfs_csr(csr, csr.vertex(root1))
+        print(f"CSR BFS on the {name} graph: {' '.join(csr.labels[u] for u in order)}")
+    big = generate_random_csr(10 ** 6, 4, seed=1)
+    start = time.perf_counter()
+    reached = len(bfs_csr(big, 0))
+    print(f"CSR BFS over {big.num_vertices} vertices reached {reached}: "
+          f"{WARNING}{time.perf_counter() - start:.6f} sec{END}")
+
+    # hop queries: full BFS against bidirectional BFS on the same pairs
+    reverse = big.transpose()
+    pairs = np.random.default_rng(2).integers(0, big.num_vertices, (3, 2))
+    full_expanded = bidirectional_expanded = 0
+    start = time.perf_counter()
+    for s, t in pairs:
+        full_expanded += bfs_distances(big, s)['expanded']
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for s, t in pairs:
+        bidirectional_expanded += bidirectional_bfs(big, s, t, reverse)['expanded']
+    bidirectional_time = time.perf_counter() - start
+    print(f"{len(pairs)} hop queries, full BFS: {full_expanded} vertices expanded, "
+          f"{WARNING}{full_time:.6f} sec{END}")
+    print(f"{len(pairs)} hop queries, bidirectional BFS: {bidirectional_expanded} vertices expanded, "
+          f"{WARNING}{bidirectional_time:.6f} sec{END}")
+
+    # the same full search level by level with NumPy frontiers
+    start = time.perf_counter()
+    levels = bfs_direction_optimizing(big, 0, reverse)
+    print(f"Direction-optimizing BFS reached {int((levels['distance'] >= 0).sum())} "
+          f"in {len(levels['steps'])} levels, {levels['steps'].count('bottom-up')} bottom-up: {WARNING}{time.perf_counter() - start:.6f} sec{END}")
+
+    # iterative DFS on a path far deeper than the recursion limit
+    path = generate_path_graph(10 ** 6)
+    start = time.perf_counter()
+    traversal = dfs_iterative(path, 0)
+    print(f"Iterative DFS over a path of {len(traversal['preorder'])} vertices: "
+          f"{WARNING}{time.perf_counter() - start:.6f} sec{END}")
+
 
     def create_graph(graph, root, title):
         G = nx.Graph()
@@ -1,7 +1,11 @@
+import os
 import sys
+from heapq import heappush, heappop
 from random import randint
+import numpy as np
 from matplotlib import pyplot as plot
 from time import time
+from concurrent.futures import ProcessPoolExecutor
 
 
 # Dijkstra algorithm for the shortest path from the source
@@ -36,10 +40,55 @@ def Dijkstra_algorithm(vertices, edges, source):
     return visited_and_distance
 
 
+# adjacency list form of the (vertices, edges) matrices: for every vertex a
+# list of (neighbor, weight) pairs, so a vertex costs its degree instead of V
+def toAdjacencyList(vertices, edges):
+    num_of_vertices = len(vertices[0])
+    return [[(neighbor, edges[vertex][neighbor]) for neighbor in range(num_of_vertices)
+             if vertices[vertex][neighbor] == 1 and neighbor != vertex]
+            for vertex in range(num_of_vertices)]
+
+
+# Dijkstra algorithm with a binary heap over an adjacency list
+# Outdated heap entries are skipped when popped (lazy deletion) instead of being
+# decreased in place. With a target the search stops as soon as the target is
+# settled. Returns the distance list (sys.maxsize where unreached) and the
+# predecessor list (-1 for the source and unreached vertices).
+def Dijkstra_heap(adjacency, source, target=None):
+    num_of_vertices = len(adjacency)
+    distance = [sys.maxsize] * num_of_vertices
+    predecessor = [-1] * num_of_vertices
+    distance[source] = 0
+    heap = [(0, source)]
+    while heap:
+        dist, vertex = heappop(heap)
+        if dist > distance[vertex]:    # a shorter path was found after this entry was pushed
+            continue
+        if vertex == target:
+            break
+        for neighbor, weight in adjacency[vertex]:
+            new_distance = dist + weight
+            if new_distance < distance[neighbor]:
+                distance[neighbor] = new_distance
+                predecessor[neighbor] = vertex
+                heappush(heap, (new_distance, neighbor))
+    return distance, predecessor
+
+
+# vertices on the shortest path from the source to target, from a predecessor list
+def shortestPath(predecessor, target):
+    path = []
+    while target != -1:
+        path.append(target)
+        target = predecessor[target]
+    path.reverse()
+    return path
+
+
 # Floyd-Warshall algorithm for the shortest path between all the vertices
 def Floyd_Warshall_algorithm(vertices, edges):
     num_of_vertices = len(vertices[0])
-    distance = edges
+    distance = [row[:] for row in edges]    # copy, so the caller's edges are left alone
     # iterate over all vertices to find the shortest path between every pair of vertices
     for k in range(num_of_vertices):
         for i in range(num_of_vertices):
@@ -48,6 +97,107 @@ def Floyd_Warshall_algorithm(vertices, edges):
                 distance[i][j] = min(distance[i][j], distance[i][k] + distance[k][j])
     return distance
 
+
+# starting distance matrix for the NumPy versions: edge weights where
+# vertices has an edge, 0 on the diagonal and inf elsewhere (float64 keeps
+# inf + weight == inf, where sys.maxsize + weight would overflow in int64)
+def distanceMatrix(vertices, edges):
+    distance = np.where(np.asarray(vertices) == 1, np.asarray(edges, dtype=np.float64), np.inf)
+    np.fill_diagonal(distance, 0)
+    return distance
+
+
+# Floyd-Warshall with NumPy: each k relaxes the whole matrix at once through
+# vertex k. Works on a fresh matrix, so the caller's edges are left alone.
+# Unreachable pairs are inf.
+def Floyd_Warshall_numpy(vertices, edges):
+    distance = distanceMatrix(vertices, edges)
+    for k in range(len(distance)):
+        np.minimum(distance, distance[:, k, None] + distance[None, k, :], out=distance)
+    return distance
+
+
+# rows per strip in Floyd_Warshall_blocked
+FLOYD_BLOCK_SIZE = 32
+
+
+# cache-blocked Floyd-Warshall
+# The vertices are cut into blocks of block_size. For every block of
+# intermediate vertices, the rows of that block are relaxed first, then every
+# other strip of block_size rows is relaxed by all k of the block while it is
+# still in cache, instead of streaming the whole matrix once per k. Same result
+# as Floyd_Warshall_numpy; pays off once the matrix outgrows the cache
+# (V in the thousands).
+def Floyd_Warshall_blocked(vertices, edges, block_size=FLOYD_BLOCK_SIZE):
+    distance = distanceMatrix(vertices, edges)
+    num_of_vertices = len(distance)
+    buffer = np.empty((block_size, num_of_vertices))
+    for k_start in range(0, num_of_vertices, block_size):
+        k_block = range(k_start, min(k_start + block_size, num_of_vertices))
+        # the strip of the current block first, so its rows are final for the others
+        strips = [k_start] + [i for i in range(0, num_of_vertices, block_size) if i != k_start]
+        for i_start in strips:
+            strip = distance[i_start:i_start + block_size]
+            relax = buffer[:len(strip)]
+            for k in k_block:
+                np.add(strip[:, k, None], distance[None, k, :], out=relax)
+                np.minimum(strip, relax, out=strip)
+    return distance
+
+
+# all-pairs shortest paths as one Dijkstra_heap per source, spread over a
+# process pool. The adjacency list is handed to every worker once through the
+# pool initializer and then only read, so a task is just a range of sources.
+# Each worker sends back its rows of the distance matrix (inf where unreachable).
+APSP_TASKS_PER_WORKER = 4
+
+worker_adjacency = None
+
+
+def initDijkstraWorker(adjacency):
+    global worker_adjacency
+    worker_adjacency = adjacency
+
+
+def dijkstraRows(first, last):
+    rows = np.array([Dijkstra_heap(worker_adjacency, source)[0] for source in range(first, last)], dtype=np.float64)
+    rows[rows == float(sys.maxsize)] = np.inf
+    return rows
+
+
+def Dijkstra_all_pairs(adjacency, workers=None):
+    workers = workers or os.cpu_count() or 1
+    num_of_vertices = len(adjacency)
+    if workers < 2 or num_of_vertices < 2:
+        initDijkstraWorker(adjacency)
+        return dijkstraRows(0, num_of_vertices).reshape(num_of_vertices, num_of_vertices)
+    span = max(1, -(-num_of_vertices // (APSP_TASKS_PER_WORKER * workers)))
+    bounds = list(range(0, num_of_vertices, span)) + [num_of_vertices]
+    with ProcessPoolExecutor(max_workers=workers, initializer=initDijkstraWorker, initargs=(adjacency,)) as pool:
+        return np.vstack(list(pool.map(dijkstraRows, bounds[:-1], bounds[1:])))
+
+
+# relative cost of one heap step (edge relaxation or pop) in Dijkstra_heap
+# against one cell update in Floyd_Warshall_numpy (measured: about 130-290 ns
+# against about 2 ns)
+DIJKSTRA_STEP_COST = 100
+
+
+# all-pairs shortest paths with whichever method is cheaper for this graph:
+# per-source Dijkstra costs about V * (E + V) heap steps shared by the workers,
+# Floyd-Warshall V^3 much cheaper vectorized cell updates, so Dijkstra wins only
+# on large sparse graphs (or with many workers). Returns the distance matrix (inf where
+# unreachable) and the name of the method used.
+def allPairsShortestPaths(vertices, edges, workers=None):
+    workers = workers or os.cpu_count() or 1
+    adjacency = toAdjacencyList(vertices, edges)
+    num_of_vertices = len(adjacency)
+    num_of_edges = sum(len(neighbors) for neighbors in adjacency)
+    if (num_of_edges + num_of_vertices) * DIJKSTRA_STEP_COST < num_of_vertices * num_of_vertices * workers:
+        return Dijkstra_all_pairs(adjacency, workers), "Dijkstra"
+    return Floyd_Warshall_numpy(vertices, edges), "Floyd-Warshall"
+
+
 # coefficients for defining the number of edges in a graph
 # thus declaring it as dense or sparse
 dense_coefficient = 80
@@ -91,113 +241,189 @@ def normalizeVerticesSet(n_vertices, vertices, edges):
                 edges[x][y] = sys.maxsize
 
 
-# testing the algorithms
-input_sizes = [10, 50, 100, 200, 300]
-dijkstra_dense, dijkstra_sparse = list(), list()
-floyd_dense, floyd_sparse = list(), list()
-start_time, end_time = 0, 0
-
-# testing on dense graphs
-for index in range(len(input_sizes)):
-    vertices, edges = generateGraph(input_sizes[index], dense_coefficient)     # generate dense graph
-    # time Dijkstra's algorithm
-    start_time = current_time_millis()
-    for k in range(0, input_sizes[index]):
-        Dijkstra_algorithm(vertices, edges, k)
-    end_time = current_time_millis()
-    # record time taken and normalize edges
-    dijkstra_dense.append(round(end_time - start_time, 3))
-    normalizeVerticesSet(len(vertices[0]), vertices, edges)
-
-    # time Floyd-Warshall algorithm
-    start_time = current_time_millis()
-    Floyd_Warshall_algorithm(vertices, edges)
-    end_time = current_time_millis()
-    floyd_dense.append(round(end_time - start_time, 3))    # record time taken
-
-# testing on sparse graphs
-for index in range(len(input_sizes)):
-    vertices, edges = generateGraph(input_sizes[index], sparse_coefficient)
-
-    start_time = current_time_millis()
-    for k in range(0, input_sizes[index]):
-        Dijkstra_algorithm(vertices, edges, k)
-    end_time = current_time_millis()
-    dijkstra_sparse.append(round(end_time - start_time, 3))
-    normalizeVerticesSet(len(vertices[0]), vertices, edges)
-    # time Floyd-Warshall algorithm
-    start_time = current_time_millis()
-    Floyd_Warshall_algorithm(vertices, edges)
-    end_time = current_time_millis()
-    floyd_sparse.append(round(end_time - start_time, 3))
-
-# Dijkstra and Floyd-Warshall separately
-plot.figure()
-plot.plot(input_sizes, dijkstra_dense, color="skyblue", label="Dense graph")
-plot.plot(input_sizes, dijkstra_sparse, color="blue", label="Sparse graph")
-plot.title("Dijkstra Algorithm", color="black", fontsize=16)
-plot.legend(loc='upper left')
-plot.xlabel(" Size ", color="black", fontsize=14)
-plot.ylabel("Time (millis)", color="black", fontsize=14)
-plot.grid()
-plot.show()
-
-plot.figure()
-plot.plot(input_sizes, floyd_dense, color="skyblue", label="Dense graph")
-plot.plot(input_sizes, floyd_sparse, color="blue", label="Sparse graph")
-plot.title("Floyd-Warshall Algorithm", color="black", fontsize=16)
-plot.legend(loc='upper left')
-plot.xlabel(" Size ", color="black", fontsize=14)
-plot.ylabel("Time (millis)", color="black", fontsize=14)
-plot.grid()
-plot.show()
-
-# comparative analysis of Dijkstra and Floyd-Warshall algorithms
-plot.figure()
-plot.plot(input_sizes, dijkstra_dense, color="skyblue", label="Dijkstra")
-plot.plot(input_sizes, floyd_dense, color="blue", label="Floyd-Warshall")
-plot.title("Dense graphs", color="black", fontsize=16)
-plot.legend(loc='upper left')
-plot.xlabel(" Size ", color="black", fontsize=14)
-plot.ylabel("Time (millis)", color="black", fontsize=14)
-plot.grid()
-plot.show()
-
-plot.figure()
-plot.plot(input_sizes, dijkstra_sparse, color="skyblue", label="Dijkstra")
-plot.plot(input_sizes, floyd_sparse, color="blue", label="Floyd-Warshall")
-plot.title("Sparse graphs", color="black", fontsize=16)
-plot.legend(loc='upper left')
-plot.xlabel(" Size ", color="black", fontsize=14)
-plot.ylabel("Time (millis)", color="black", fontsize=14)
-plot.grid()
-plot.show()
-
-
-# print time record for Dijkstra on dense graphs
-print("Dijkstra's algorithm on dense graphs:")
-for index in range(len(input_sizes)):
-    print(f"Graph size: {input_sizes[index]}")
-    print(f"Time taken: {dijkstra_dense[index]} ms")
-    print()
-
-# print time record for Dijkstra on sparse graphs
-print("Dijkstra's algorithm on sparse graphs:")
-for index in range(len(input_sizes)):
-    print(f"Graph size: {input_sizes[index]}")
-    print(f"Time taken: {dijkstra_sparse[index]} ms")
-    print()
-
-# print time record for Floyd-Warshall on dense graphs
-print("Floyd-Warshall algorithm on dense graphs:")
-for index in range(len(input_sizes)):
-    print(f"Graph size: {input_sizes[index]}")
-    print(f"Time taken: {floyd_dense[index]} ms")
-    print()
-
-# print time record for Floyd-Warshall on sparse graphs
-print("Floyd-Warshall algorithm on sparse graphs:")
-for index in range(len(input_sizes)):
-    print(f"Graph size: {input_sizes[index]}")
-    print(f"Time taken: {floyd_sparse[index]} ms")
-    print()
+if __name__ == '__main__':
+    # testing the algorithms
+    input_sizes = [10, 50, 100, 200, 300]
+    dijkstra_dense, dijkstra_sparse = list(), list()
+    heap_dense, heap_sparse = list(), list()
+    floyd_dense, floyd_sparse = list(), list()
+    floyd_np_dense, floyd_np_sparse = list(), list()
+    floyd_blocked_dense, floyd_blocked_sparse = list(), list()
+    start_time, end_time = 0, 0
+
+    # testing on dense graphs
+    for index in range(len(input_sizes)):
+        vertices, edges = generateGraph(input_sizes[index], dense_coefficient)     # generate dense graph
+        # time Dijkstra's algorithm
+        start_time = current_time_millis()
+        for k in range(0, input_sizes[index]):
+            Dijkstra_algorithm(vertices, edges, k)
+        end_time = current_time_millis()
+        # record time taken and normalize edges
+        dijkstra_dense.append(round(end_time - start_time, 3))
+        # time the heap-based Dijkstra over the adjacency list
+        start_time = current_time_millis()
+        adjacency = toAdjacencyList(vertices, edges)
+        for k in range(0, input_sizes[index]):
+            Dijkstra_heap(adjacency, k)
+        end_time = current_time_millis()
+        heap_dense.append(round(end_time - start_time, 3))
+        normalizeVerticesSet(len(vertices[0]), vertices, edges)
+
+        # time Floyd-Warshall algorithm
+        start_time = current_time_millis()
+        Floyd_Warshall_algorithm(vertices, edges)
+        end_time = current_time_millis()
+        floyd_dense.append(round(end_time - start_time, 3))    # record time taken
+
+        # time the NumPy and blocked NumPy Floyd-Warshall
+        start_time = current_time_millis()
+        Floyd_Warshall_numpy(vertices, edges)
+        end_time = current_time_millis()
+        floyd_np_dense.append(round(end_time - start_time, 3))
+        start_time = current_time_millis()
+        Floyd_Warshall_blocked(vertices, edges)
+        end_time = current_time_millis()
+        floyd_blocked_dense.append(round(end_time - start_time, 3))
+
+    # testing on sparse graphs
+    for index in range(len(input_sizes)):
+        vertices, edges = generateGraph(input_sizes[index], sparse_coefficient)
+
+        start_time = current_time_millis()
+        for k in range(0, input_sizes[index]):
+            Dijkstra_algorithm(vertices, edges, k)
+        end_time = current_time_millis()
+        dijkstra_sparse.append(round(end_time - start_time, 3))
+        start_time = current_time_millis()
+        adjacency = toAdjacencyList(vertices, edges)
+        for k in range(0, input_sizes[index]):
+            Dijkstra_heap(adjacency, k)
+        end_time = current_time_millis()
+        heap_sparse.append(round(end_time - start_time, 3))
+        normalizeVerticesSet(len(vertices[0]), vertices, edges)
+        # time Floyd-Warshall algorithm
+        start_time = current_time_millis()
+        Floyd_Warshall_algorithm(vertices, edges)
+        end_time = current_time_millis()
+        floyd_sparse.append(round(end_time - start_time, 3))
+        start_time = current_time_millis()
+        Floyd_Warshall_numpy(vertices, edges)
+        end_time = current_time_millis()
+        floyd_np_sparse.append(round(end_time - start_time, 3))
+        start_time = current_time_millis()
+        Floyd_Warshall_blocked(vertices, edges)
+        end_time = current_time_millis()
+        floyd_blocked_sparse.append(round(end_time - start_time, 3))
+
+    # Dijkstra and Floyd-Warshall separately
+    plot.figure()
+    plot.plot(input_sizes, dijkstra_dense, color="skyblue", label="Dense graph")
+    plot.plot(input_sizes, dijkstra_sparse, color="blue", label="Sparse graph")
+    plot.plot(input_sizes, heap_dense, color="lightgreen", label="Dense graph (heap)")
+    plot.plot(input_sizes, heap_sparse, color="green", label="Sparse graph (heap)")
+    plot.title("Dijkstra Algorithm", color="black", fontsize=16)
+    plot.legend(loc='upper left')
+    plot.xlabel(" Size ", color="black", fontsize=14)
+    plot.ylabel("Time (millis)", color="black", fontsize=14)
+    plot.grid()
+    plot.show()
+
+    plot.figure()
+    plot.plot(input_sizes, floyd_dense, color="skyblue", label="Dense graph")
+    plot.plot(input_sizes, floyd_sparse, color="blue", label="Sparse graph")
+    plot.plot(input_sizes, floyd_np_dense, color="lightgreen", label="Dense graph (NumPy)")
+    plot.plot(input_sizes, floyd_np_sparse, color="green", label="Sparse graph (NumPy)")
+    plot.plot(input_sizes, floyd_blocked_dense, color="orange", label="Dense graph (blocked)")
+    plot.plot(input_sizes, floyd_blocked_sparse, color="red", label="Sparse graph (blocked)")
+    plot.title("Floyd-Warshall Algorithm", color="black", fontsize=16)
+    plot.legend(loc='upper left')
+    plot.xlabel(" Size ", color="black", fontsize=14)
+    plot.ylabel("Time (millis)", color="black", fontsize=14)
+    plot.grid()
+    plot.show()
+
+    # comparative analysis of Dijkstra and Floyd-Warshall algorithms
+    plot.figure()
+    plot.plot(input_sizes, dijkstra_dense, color="skyblue", label="Dijkstra")
+    plot.plot(input_sizes, floyd_dense, color="blue", label="Floyd-Warshall")
+    plot.title("Dense graphs", color="black", fontsize=16)
+    plot.legend(loc='upper left')
+    plot.xlabel(" Size ", color="black", fontsize=14)
+    plot.ylabel("Time (millis)", color="black", fontsize=14)
+    plot.grid()
+    plot.show()
+
+    plot.figure()
+    plot.plot(input_sizes, dijkstra_sparse, color="skyblue", label="Dijkstra")
+    plot.plot(input_sizes, floyd_sparse, color="blue", label="Floyd-Warshall")
+    plot.title("Sparse graphs", color="black", fontsize=16)
+    plot.legend(loc='upper left')
+    plot.xlabel(" Size ", color="black", fontsize=14)
+    plot.ylabel("Time (millis)", color="black", fontsize=14)
+    plot.grid()
+    plot.show()
+
+
+    # print time record for Dijkstra on dense graphs
+    print("Dijkstra's algorithm on dense graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {dijkstra_dense[index]} ms")
+        print()
+
+    # print time record for Dijkstra on sparse graphs
+    print("Dijkstra's algorithm on sparse graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {dijkstra_sparse[index]} ms")
+        print()
+
+    # print time record for the heap-based Dijkstra
+    print("Dijkstra's algorithm with a binary heap on dense graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {heap_dense[index]} ms")
+        print()
+
+    print("Dijkstra's algorithm with a binary heap on sparse graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {heap_sparse[index]} ms")
+        print()
+
+    # print time record for Floyd-Warshall on dense graphs
+    print("Floyd-Warshall algorithm on dense graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {floyd_dense[index]} ms")
+        print()
+
+    # print time record for Floyd-Warshall on sparse graphs
+    print("Floyd-Warshall algorithm on sparse graphs:")
+    for index in range(len(input_sizes)):
+        print(f"Graph size: {input_sizes[index]}")
+        print(f"Time taken: {floyd_sparse[index]} ms")
+        print()
+
+    # print time record for the NumPy Floyd-Warshall versions
+    for title, record in [("NumPy Floyd-Warshall on dense graphs:", floyd_np_dense),
+                          ("NumPy Floyd-Warshall on sparse graphs:", floyd_np_sparse),
+                          ("Blocked Floyd-Warshall on dense graphs:", floyd_blocked_dense),
+                          ("Blocked Floyd-Warshall on sparse graphs:", floyd_blocked_sparse)]:
+        print(title)
+        for index in range(len(input_sizes)):
+            print(f"Graph size: {input_sizes[index]}")
+            print(f"Time taken: {record[index]} ms")
+            print()
+
+    # all-pairs shortest paths with the method picked from the graph's density
+    print(f"All-pairs shortest paths with {os.cpu_count()} worker(s):")
+    for coef in [1, sparse_coefficient, dense_coefficient]:
+        vertices, edges = generateGraph(input_sizes[-1], coef)
+        start_time = current_time_millis()
+        distance, method = allPairsShortestPaths(vertices, edges)
+        end_time = current_time_millis()
+        print(f"Graph size: {input_sizes[-1]}, edge coefficient: {coef}")
+        print(f"Method: {method}, time taken: {round(end_time - start_time, 3)} ms")
+        print()